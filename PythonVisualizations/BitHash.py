@@ -1,32 +1,573 @@
 
-import random
+import array
+import hashlib
+import mmap
+import operator
+import os
+import sys
 
-# setup a list of random 64-bit values to be used by BitHash
-__bits = [0] * (64*1024)
-__rnd = random.Random()
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-# seed the generator to produce repeatable results
-__rnd.seed("BitHash random numbers") 
+# BitHash uses a table of 64K random 64-bit values. Generating it takes
+# 64K calls to getrandbits(), so rather than doing that on import, the
+# table is built the first time it is needed and saved in a cache
+# directory. Later processes memory map the saved table instead of
+# generating it again. Set BITHASH_CACHE_DIR to change where the
+# tables are kept.
+_TABLE_SIZE = 64*1024
+_SEED = "BitHash random numbers"
+_CACHE_DIR = os.environ.get("BITHASH_CACHE_DIR") or \
+             os.path.join(os.path.expanduser("~"), ".cache", "BitHash")
 
-# fill the list
-for i in range(64*1024): 
-    __bits[i] = __rnd.getrandbits(64)
+# the table currently used by BitHash (None until first use), and the
+# number of times ResetBitHash() has replaced it
+__bits = None
+__generation = 0
+
+# Return the table BitHash is currently using, loading it if need be.
+def _currentBits():
+    global __bits
+    if __bits is None:
+        __bits = _loadBits(_SEED, __generation)
+    return __bits
+
+# The random number generator that made the last table generated, as
+# (repr(seed), generation, generator), so that the next generation of
+# the same seed carries on from it instead of starting again.
+__generator = None
+
+# Return the random table for the given seed and generation, where
+# generation n is the table BitHash uses after n calls to ResetBitHash().
+# The table comes from the cache if it's there. Otherwise it's generated
+# and saved to the cache. The random numbers for each generation follow
+# on from the previous one, so they are generated from the seed up
+# only when the generator for the generation before isn't at hand,
+# as in a fresh process. Those earlier tables aren't saved.
+def _loadBits(seed, generation):
+    global __generator
+    try:
+        return _mapBits(_cachePath(seed, generation))
+    except (OSError, ValueError):
+        pass
+
+    if __generator is not None and __generator[0] == repr(seed) and \
+       __generator[1] < generation:
+        first, rnd = __generator[1] + 1, __generator[2]
+    else:
+        import random
+        first, rnd = 0, random.Random()
+        rnd.seed(seed)
+    for g in range(first, generation + 1):
+        bits = array.array('Q', (rnd.getrandbits(64) for i in range(_TABLE_SIZE)))
+    __generator = (repr(seed), generation, rnd)
+    _saveBits(bits, _cachePath(seed, generation))
+    return bits
+
+# A table's cache file is named after the full SHA-256 digest of its
+# seed, so that two seeds never share a file.
+def _cachePath(seed, generation):
+    digest = hashlib.sha256(repr(seed).encode('utf-8')).hexdigest()
+    name = "%s-%d-%s.bits" % (digest, generation, sys.byteorder)
+    return os.path.join(_CACHE_DIR, name)
+
+# Memory map a cached table read-only, without copying it.
+def _mapBits(path):
+    with open(path, 'rb') as f:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(m) != _TABLE_SIZE * 8:
+        m.close()
+        raise ValueError("corrupt BitHash cache file " + path)
+    return memoryview(m).cast('Q')
+
+# Save a table to the cache. The table is written to a temporary file
+# that is then renamed, so other processes never map a partial table.
+# If the cache directory can't be written the table just isn't saved.
+def _saveBits(bits, path):
+    import tempfile
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            bits.tofile(f)
+        os.replace(tmp, path)
+    except OSError:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
 
 def BitHash(s, h = 0):
+    bits = __bits if __bits is not None else _currentBits()
     for c in s: 
-        h  = (((h << 1) | (h >> 63)) ^ __bits[ord(c)]) 
+        h  = (((h << 1) | (h >> 63)) ^ bits[ord(c)]) 
         h &= 0xffffffffffffffff
     return h
 
 # this function causes subsequent calls to BitHash to be
 # based on a new set of random numbers. This is useful
 # in the event that client code needs a new hash function,
-# for example, for Cuckoo Hashing. 
+# for example, for Cuckoo Hashing. Like the first table,
+# the new one is loaded lazily and cached on disk.
 def ResetBitHash():
-    global __bits
-    for i in range(64*1024): 
-        __bits[i] = __rnd.getrandbits(64)   
+    global __bits, __npBits, __generation
+    __generation += 1
+    __bits = None
+    __npBits = None
+
+# numpy copy of __bits used by batch(), built on first use and
+# discarded whenever ResetBitHash() changes __bits.
+__npBits = None
+
+# Hash every key in keys, returning the hashes in a numpy uint64 array
+# (or in an array.array('Q') if numpy isn't installed). The hashes are
+# identical to those returned by BitHash(key, seed) for each key.
+# seed is either a single int or a sequence holding one seed per key,
+# so the result of one call can seed the next, as BloomFilter does:
+#
+#     h1 = batch(keys);  h2 = batch(keys, h1)
+#
+# keys is normally a sequence of strings. It can also be a packed
+# buffer of characters (a str, or a bytes or array.array of character
+# codes) together with offsets, where key i is keys[offsets[i]:offsets[i+1]],
+# so offsets holds one more entry than there are keys.
+def batch(keys, seed = 0, offsets = None):
+    global __npBits
+    if numpy is None:
+        return _batchNoNumpy(_currentBits(), keys, seed, offsets)
+    if __npBits is None:
+        __npBits = _npTable(_currentBits())
+    return _batch(__npBits, keys, seed, offsets)
+
+# Hash a non-negative integer without converting it to a string. The
+# integer is split into 16-bit pieces, which index the table just like
+# the characters of a string do, so this is tabulation hashing with the
+# same table and seeding as BitHash. In fact IntHash(n, h) equals
+# BitHash(s, h) where s has one character per 16-bit piece of n, most
+# significant first. Integers below 65536 take a single table lookup.
+def IntHash(n, h = 0):
+    return _intHash(__bits if __bits is not None else _currentBits(), n, h)
+
+def _intHash(bits, n, h):
+    # accepts any integer type, such as the elements of a numpy array
+    n = operator.index(n)
+    if n < 0:
+        raise ValueError("IntHash can only hash non-negative integers")
+    shift = (n.bit_length() - 1) // 16 * 16 if n else 0
+    while shift >= 0:
+        h  = (((h << 1) | (h >> 63)) ^ bits[(n >> shift) & 0xffff])
+        h &= 0xffffffffffffffff
+        shift -= 16
+    return h
+
+# Like batch() for integer keys: returns IntHash(key, seed) for each of
+# keys as a numpy uint64 array (or an array.array('Q') without numpy).
+# keys can be any sequence or numpy array of integers below 2**64, and
+# seed an int or a sequence of one seed per key.
+def int_batch(keys, seed = 0):
+    return _intBatch(_currentBits(), keys, seed)
+
+def _intBatch(bits, keys, seed):
+    if numpy is None:
+        seeds = [seed] * len(keys) if isinstance(seed, int) else seed
+        return array.array('Q', (_intHash(bits, k, h) for k, h in zip(keys, seeds)))
+
+    if isinstance(keys, numpy.ndarray):
+        if keys.dtype.kind == 'i' and keys.size and keys.min() < 0:
+            raise ValueError("IntHash can only hash non-negative integers")
+        keys = keys.astype(numpy.uint64, copy=False)
+    elif any(k < 0 for k in keys):
+        raise ValueError("IntHash can only hash non-negative integers")
+    else:
+        keys = numpy.array(keys, dtype=numpy.uint64)
+    h = numpy.empty(len(keys), dtype=numpy.uint64)
+    h[:] = seed
+    npBits = numpy.frombuffer(bits, dtype=numpy.uint64)
+    one, wrap, low = numpy.uint64(1), numpy.uint64(63), numpy.uint64(0xffff)
+
+    # the number of 16-bit pieces in each key, at least 1
+    pieces = 1 + sum((keys >= numpy.uint64(1 << s)) for s in (16, 32, 48))
+    for p in range(3, -1, -1):
+        piece = (keys >> numpy.uint64(16 * p)) & low
+        hashed = ((h << one) | (h >> wrap)) ^ npBits[piece]
+        h = numpy.where(pieces > p, hashed, h)
+    return h
+
+# Return k bucket indexes in range(m) for key, all derived from the two
+# hashes h1 = BitHash(key) and h2 = BitHash(key, h1) as (h1 + i*h2) % m
+# (Kirsch and Mitzenmacher's double hashing). For a Bloom filter with
+# k hash functions this costs two passes over the key instead of k.
+def multi(key, k, m):
+    h1 = BitHash(key)
+    return _multi(h1, BitHash(key, h1), k, m)
+
+def _multi(h1, h2, k, m):
+    h1 %= m
+    # a step of 0 would give k copies of the same index
+    step = h2 % m or 1
+    out = []
+    for i in range(k):
+        out.append(h1)
+        h1 += step
+        if h1 >= m: h1 -= m
+    return out
+
+# A BitHashFamily is a hash function with its own table of random
+# numbers. Any number of families can be used at the same time, for
+# example one for each of the tables in a cuckoo hash table, or one
+# for each of several Bloom filters:
+#
+#     f1 = BitHashFamily(1);  f2 = BitHashFamily(2)
+#     h1 = f1.hash("foo");    h2 = f2.hash("foo")
+#
+# The table is derived from seed and generation just like BitHash's
+# own table (and is cached on disk in the same way), so the default
+# family hashes exactly like BitHash does before any ResetBitHash().
+# Alternatively a family can be given its table directly, as bits.
+# A family never changes its table once it has one, so unlike the
+# module level functions it can be used safely from several threads.
+class BitHashFamily(object):
+    def __init__(self, seed = _SEED, generation = 0, bits = None):
+        self.seed = seed
+        self.generation = generation
+        if bits is not None:
+            if len(bits) != _TABLE_SIZE:
+                raise ValueError("a BitHash table must have %d entries" % _TABLE_SIZE)
+            bits = array.array('Q', bits)
+        self._bits = bits
+        self._npBits = None
+
+    # the family's table, loaded on first use
+    def bits(self):
+        if self._bits is None:
+            self._bits = _loadBits(self.seed, self.generation)
+        return self._bits
+
+    def hash(self, key, seed = 0):
+        bits = self._bits if self._bits is not None else self.bits()
+        h = seed
+        for c in key:
+            h  = (((h << 1) | (h >> 63)) ^ bits[ord(c)])
+            h &= 0xffffffffffffffff
+        return h
+
+    # a family can be called just like BitHash
+    __call__ = hash
+
+    # like the module level multi(), using this family's table
+    def multi(self, key, k, m):
+        h1 = self.hash(key)
+        return _multi(h1, self.hash(key, h1), k, m)
+
+    # like the module level IntHash(), using this family's table
+    def int_hash(self, n, seed = 0):
+        return _intHash(self.bits(), n, seed)
+
+    # like the module level int_batch(), using this family's table
+    def int_batch(self, keys, seed = 0):
+        return _intBatch(self.bits(), keys, seed)
+
+    # a BitHasher that hashes with this family's table
+    def hasher(self, seed = 0):
+        return BitHasher(seed, self)
+
+    # like the module level batch(), using this family's table
+    def batch(self, keys, seed = 0, offsets = None):
+        if numpy is None:
+            return _batchNoNumpy(self.bits(), keys, seed, offsets)
+        if self._npBits is None:
+            self._npBits = _npTable(self.bits())
+        return _batch(self._npBits, keys, seed, offsets)
+
+    def __repr__(self):
+        return "BitHashFamily(%r, %d)" % (self.seed, self.generation)
+
+# A BitHasher computes BitHash incrementally, so that input too big to
+# hold in one string can be hashed a piece at a time:
+#
+#     hasher = BitHasher()
+#     with open("bigfile", "rb") as f:
+#         hasher.update(f)
+#     h = hasher.digest()
+#
+# digest() returns the same value as BitHash(all the input, seed). Each
+# piece given to update() can be a str, a bytes-like object such as
+# bytes, bytearray or memoryview (each byte is hashed as the character
+# with that code, as if the bytes were decoded as latin-1), or a file
+# object, which is read to the end in blocks of blockSize.
+# The hasher uses BitHash's current table, or family's if one is given.
+class BitHasher(object):
+    blockSize = 1024 * 1024
+
+    def __init__(self, seed = 0, family = None):
+        self.__bits = family.bits() if family is not None else _currentBits()
+        self.__h = seed
+
+    def update(self, data):
+        if hasattr(data, 'readinto'):
+            # binary file: read into one reused buffer
+            buf = bytearray(self.blockSize)
+            view = memoryview(buf)
+            while True:
+                n = data.readinto(buf)
+                if not n: break
+                self.__update(view[:n])
+        elif hasattr(data, 'read'):
+            while True:
+                block = data.read(self.blockSize)
+                if not block: break
+                self.__update(block)
+        else:
+            self.__update(data)
+
+    def __update(self, chunk):
+        if isinstance(chunk, str):
+            if numpy is None or len(chunk) < 64:
+                codes = map(ord, chunk)
+            else:
+                codes = numpy.frombuffer(chunk.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        else:
+            codes = memoryview(chunk).cast('B')
+            if numpy is not None and len(codes) >= 64:
+                codes = numpy.frombuffer(codes, dtype=numpy.uint8)
+
+        h, bits = self.__h, self.__bits
+        if numpy is None or not isinstance(codes, numpy.ndarray):
+            for c in codes:
+                h  = (((h << 1) | (h >> 63)) ^ bits[c])
+                h &= 0xffffffffffffffff
+            self.__h = h
+            return
+
+        # Hashing c[1..n] into h gives rotl(h, n) ^ the XOR of every
+        # rotl(bits[c[i]], n-i), which numpy computes for a whole block.
+        if len(codes) and int(codes.max()) >= _TABLE_SIZE:
+            raise IndexError("character code out of range for BitHash")
+        npBits = numpy.frombuffer(bits, dtype=numpy.uint64)
+        for i in range(0, len(codes), self.blockSize):
+            block = codes[i:i + self.blockSize]
+            n = len(block)
+            vals = npBits[block]
+            r = ((n - 1 - numpy.arange(n)) % 64).astype(numpy.uint64)
+            x = int(numpy.bitwise_xor.reduce((vals << r) | (vals >> ((64 - r) % 64))))
+            s = n % 64
+            h = (((h << s) | (h >> (64 - s))) & 0xffffffffffffffff) ^ x
+        self.__h = h
+
+    def digest(self):
+        return self.__h
+
+    # a new BitHasher in the same state, which can be given different
+    # input from here on
+    def copy(self):
+        other = BitHasher.__new__(BitHasher)
+        other.__bits, other.__h = self.__bits, self.__h
+        return other
+
+# Return a numpy copy of a table with one extra zero entry at the end,
+# which _batch() uses to pad short keys.
+def _npTable(bits):
+    return numpy.append(numpy.frombuffer(bits, dtype=numpy.uint64), numpy.uint64(0))
+
+# _batch() hashes keys in groups sorted by length. Each group becomes a
+# (keys x longest key) matrix of characters, so these bound its size.
+_BATCH_ROWS  = 4096
+_BATCH_CELLS = 4 * 1024 * 1024
+
+def _batch(npBits, keys, seed, offsets):
+    codes, starts, lengths = _batchCodes(keys, offsets)
+    n = len(lengths)
+    seeds = numpy.empty(n, dtype=numpy.uint64)
+    seeds[:] = seed
+    out = numpy.empty(n, dtype=numpy.uint64)
+    if n == 0: return out
+    if len(codes) and int(codes.max()) >= _TABLE_SIZE:
+        raise IndexError("character code out of range for BitHash")
+
+    pad = len(npBits) - 1
+    one, wrap = numpy.uint64(1), numpy.uint64(63)
+
+    # Keys are right-aligned in the matrix, and the padding to their
+    # left hashes to zero. Padding still rotates h once per column, so
+    # pre-rotate each seed right by the amount of padding in its row.
+    order = numpy.argsort(lengths, kind='stable')
+    g = 0
+    while g < n:
+        longest = max(int(lengths[order[min(g + _BATCH_ROWS, n) - 1]]), 1)
+        rows = max(1, min(_BATCH_ROWS, _BATCH_CELLS // longest))
+        idx = order[g:g + rows]
+        lens = lengths[idx]
+        width = int(lens.max())
+
+        h = seeds[idx]
+        r = ((width - lens) % 64).astype(numpy.uint64)
+        h = numpy.where(r == 0, h, (h >> r) | (h << ((64 - r) % 64)))
+
+        mat = numpy.full((len(idx), width), pad, dtype=numpy.uint32)
+        total = int(lens.sum())
+        if total:
+            row = numpy.repeat(numpy.arange(len(idx)), lens)
+            first = numpy.repeat(numpy.cumsum(lens) - lens, lens)
+            pos = numpy.arange(total) - first
+            mat[row, numpy.repeat(width - lens, lens) + pos] = \
+                codes[numpy.repeat(starts[idx], lens) + pos]
+
+        for c in range(width):
+            h = ((h << one) | (h >> wrap)) ^ npBits[mat[:, c]]
+        out[idx] = h
+        g += len(idx)
+    return out
+
+# Return a flat numpy array of the character codes of all the keys,
+# with the start and length of each key in that array.
+def _batchCodes(keys, offsets):
+    if offsets is None:
+        lengths = numpy.fromiter(map(len, keys), dtype=numpy.int64, count=len(keys))
+        keys = ''.join(keys)
+        starts = numpy.cumsum(lengths) - lengths
+    else:
+        offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        starts, lengths = offsets[:-1], numpy.diff(offsets)
+    if isinstance(keys, str):
+        codes = numpy.frombuffer(keys.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+    else:
+        codes = numpy.asarray(memoryview(keys))
+    return codes, starts, lengths
+
+def _batchNoNumpy(bits, keys, seed, offsets):
+    if offsets is None:
+        n = len(keys)
+        keys = [map(ord, s) for s in keys]
+    else:
+        n = len(offsets) - 1
+        if isinstance(keys, str):
+            keys = [map(ord, keys[offsets[i]:offsets[i+1]]) for i in range(n)]
+        else:
+            codes = memoryview(keys)
+            keys = [codes[offsets[i]:offsets[i+1]] for i in range(n)]
+    seeds = [seed] * n if isinstance(seed, int) else seed
+    out = array.array('Q')
+    for key, h in zip(keys, seeds):
+        for c in key:
+            h  = (((h << 1) | (h >> 63)) ^ bits[c])
+            h &= 0xffffffffffffffff
+        out.append(h)
+    return out
+
+# Hash every string in iterable with a pool of worker processes,
+# yielding the hashes in the same order as the keys, as BitHash(key,
+# seed) would. The keys are handed out in chunks of chunksize, and each
+# worker has only one chunk at a time, so iterable can be a stream of
+# any length. Rather than each worker loading the table for itself,
+# the table (BitHash's current one, or family's) is copied once into
+# shared memory, which all the workers attach to. workers defaults to
+# the number of CPUs, and must be at least 1.
+#
+# The workers are plain Processes talking over Pipes rather than a
+# multiprocessing Pool, because Pool imports the standard library's
+# queue module, which this directory's queue.py hides. On platforms
+# that start workers with spawn (Windows, macOS), the calling script
+# must guard its main code with if __name__ == '__main__'.
+def parallel_hash(iterable, workers = None, seed = 0, family = None, chunksize = 10000):
+    # checked here rather than in the generator, so that a bad count
+    # fails when parallel_hash is called, not when it is first iterated
+    if workers is None:
+        workers = os.cpu_count() or 1
+    elif workers < 1:
+        raise ValueError("parallel_hash needs at least 1 worker")
+    return _parallelHash(iterable, workers, seed, family, chunksize)
+
+def _parallelHash(iterable, workers, seed, family, chunksize):
+    from collections import deque
+    from multiprocessing import Pipe, Process, shared_memory
+
+    bits = family.bits() if family is not None else _currentBits()
+    # the table followed by the zero entry that _batch() pads keys with
+    shm = shared_memory.SharedMemory(create=True, size=(_TABLE_SIZE + 1) * 8)
+    procs, conns = [], []
+    try:
+        shm.buf[:_TABLE_SIZE * 8] = memoryview(bits).cast('B')
+        shm.buf[_TABLE_SIZE * 8:] = bytes(8)
+        for i in range(workers):
+            conn, child = Pipe()
+            p = Process(target=_hashWorker, args=(child, shm.name), daemon=True)
+            p.start()
+            child.close()
+            procs.append(p)
+            conns.append(conn)
+
+        # Chunk i goes to worker i % workers, and a worker is only sent
+        # its next chunk once its last result has been received, so the
+        # results arrive in order and a worker is never left blocked
+        # sending a result while it's being sent a chunk.
+        chunks = _chunks(iterable, chunksize)
+        busy = deque()
+        for conn in conns:
+            keys = next(chunks, None)
+            if keys is None: break
+            conn.send((keys, seed))
+            busy.append(conn)
+        while busy:
+            conn = busy.popleft()
+            hashes = conn.recv()
+            if isinstance(hashes, Exception):
+                raise hashes
+            keys = next(chunks, None)
+            if keys is not None:
+                conn.send((keys, seed))
+                busy.append(conn)
+            for h in hashes:
+                yield int(h)
+
+        for conn in conns:
+            conn.send(None)
+        for p in procs:
+            p.join()
+    finally:
+        for p in procs:
+            if p.is_alive(): p.terminate()
+        for conn in conns:
+            conn.close()
+        shm.close()
+        shm.unlink()
+
+def _chunks(iterable, size):
+    chunk = []
+    for key in iterable:
+        chunk.append(key)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
+# Body of a parallel_hash() worker process: hash each chunk of keys it
+# is sent, using the table in the shared memory called name, until it
+# is sent None.
+def _hashWorker(conn, name):
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=name)
+    if numpy is None:
+        bits = shm.buf.cast('Q')[:_TABLE_SIZE]
+    else:
+        bits = numpy.frombuffer(shm.buf, dtype=numpy.uint64)
+    while True:
+        task = conn.recv()
+        if task is None: break
+        keys, seed = task
+        try:
+            if numpy is None:
+                hashes = _batchNoNumpy(bits, keys, seed, None)
+            else:
+                hashes = _batch(bits, keys, seed, None)
+        except Exception as e:
+            hashes = e
+        conn.send(hashes)
+    # the shared memory can't be closed while bits still refers to it
+    del bits
+    shm.close()
+    conn.close()
 
 def __main():
     # use BitHash to get two hash values for each of a bunch of strings
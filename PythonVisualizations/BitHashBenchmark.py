@@ -0,0 +1,205 @@
+
+# Throughput and quality benchmarks for BitHash. Run it as
+#
+#     python BitHashBenchmark.py [-n KEYS] [-o results.json]
+#
+# It times the scalar (BitHash), batch (batch) and integer (IntHash,
+# int_batch) paths over several key length distributions, reporting
+# nanoseconds per byte and keys per second, and measures how evenly
+# each path spreads keys over buckets (chi-square) and how many output
+# bits change when one input bit is flipped (avalanche). The results
+# are printed, or saved with -o, as JSON so runs can be compared
+# whenever the hash or the generation of its table changes.
+
+import argparse
+import json
+import math
+import platform
+import random
+import shutil
+import tempfile
+import time
+
+import BitHash
+from BitHash import BitHash as bitHash, IntHash, batch, int_batch, numpy
+
+# each string distribution is a function returning a random key length
+STRING_DISTRIBUTIONS = {
+    "short":  lambda rnd: rnd.randint(1, 8),
+    "medium": lambda rnd: rnd.randint(8, 32),
+    "long":   lambda rnd: rnd.randint(64, 256),
+    "mixed":  lambda rnd: min(1024, int(rnd.expovariate(1 / 20.0)) + 1),
+}
+
+# each integer distribution is a function returning a random key
+INT_DISTRIBUTIONS = {
+    "small": lambda rnd: rnd.randrange(100),
+    "16bit": lambda rnd: rnd.getrandbits(16),
+    "64bit": lambda rnd: rnd.getrandbits(64),
+}
+
+BUCKETS = 1024
+
+def randomKeys(n, length, rnd):
+    return [''.join(chr(rnd.randint(32, 126)) for i in range(length(rnd)))
+            for k in range(n)]
+
+# Return the fastest of repeats runs of fn(), in seconds.
+def bestTime(fn, repeats):
+    best = float("inf")
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def throughputEntry(path, distribution, nKeys, nBytes, seconds):
+    return {"path": path, "distribution": distribution,
+            "keys": nKeys, "bytes": nBytes, "seconds": seconds,
+            "nsPerByte": seconds * 1e9 / max(nBytes, 1),
+            "keysPerSecond": nKeys / seconds if seconds else None}
+
+def throughput(n, repeats, rnd):
+    results = []
+    for name, length in sorted(STRING_DISTRIBUTIONS.items()):
+        keys = randomKeys(n, length, rnd)
+        nBytes = sum(map(len, keys))
+        t = bestTime(lambda: [bitHash(k) for k in keys], repeats)
+        results.append(throughputEntry("scalar", name, n, nBytes, t))
+        t = bestTime(lambda: batch(keys), repeats)
+        results.append(throughputEntry("batch", name, n, nBytes, t))
+
+    for name, make in sorted(INT_DISTRIBUTIONS.items()):
+        keys = [make(rnd) for i in range(n)]
+        nBytes = 8 * n
+        t = bestTime(lambda: [IntHash(k) for k in keys], repeats)
+        results.append(throughputEntry("int", name, n, nBytes, t))
+        if numpy is not None:
+            keys = numpy.array(keys, dtype=numpy.uint64)
+        t = bestTime(lambda: int_batch(keys), repeats)
+        results.append(throughputEntry("int_batch", name, n, nBytes, t))
+    return results
+
+# Chi-square statistic of the hashes spread over BUCKETS buckets, with
+# z, its distance from the expected value in standard deviations.
+def chiSquare(hashes):
+    counts = [0] * BUCKETS
+    for h in hashes:
+        counts[int(h) % BUCKETS] += 1
+    expected = len(hashes) / float(BUCKETS)
+    chi2 = sum((c - expected) ** 2 for c in counts) / expected
+    df = BUCKETS - 1
+    return {"buckets": BUCKETS, "chiSquare": chi2,
+            "z": (chi2 - df) / math.sqrt(2 * df)}
+
+# For each key and each of its input bits, flip that bit and see which
+# output bits change. Ideally every output bit changes half the time.
+# Reports the mean fraction of output bits changed and the worst bias,
+# the largest distance from 0.5 of the probability that a given input
+# bit flips a given output bit.
+def avalanche(keys, flips, hashAll):
+    inBits = len(flips(keys[0]))
+    changed = [[0] * 64 for i in range(inBits)]
+    base = hashAll(keys)
+    total = 0
+    for i in range(inBits):
+        flipped = hashAll([flips(k)[i] for k in keys])
+        row = changed[i]
+        for h0, h1 in zip(base, flipped):
+            d = int(h0) ^ int(h1)
+            total += bin(d).count('1')
+            while d:
+                low = d & -d
+                row[low.bit_length() - 1] += 1
+                d ^= low
+    n = float(len(keys))
+    worst = max(abs(c / n - 0.5) for row in changed for c in row)
+    return {"keys": len(keys), "inputBits": inBits,
+            "mean": total / (n * inBits * 64), "worstBias": worst}
+
+# the strings made by flipping each of the low 8 bits of each character
+def stringFlips(key):
+    return [key[:i] + chr(ord(key[i]) ^ (1 << b)) + key[i+1:]
+            for i in range(len(key)) for b in range(8)]
+
+def intFlips(key):
+    return [key ^ (1 << b) for b in range(64)]
+
+def quality(n, avalancheKeys, rnd):
+    keys = randomKeys(n, STRING_DISTRIBUTIONS["medium"], rnd)
+    scalar = [bitHash(k) for k in keys]
+    batched = batch(keys)
+    intKeys = list(range(n))
+    ints = [IntHash(k) for k in intKeys]
+    intBatched = int_batch(intKeys)
+
+    fixed = randomKeys(avalancheKeys, lambda rnd: 8, rnd)
+    randomInts = [rnd.getrandbits(64) for i in range(avalancheKeys)]
+    return {
+        "scalar":    dict(chiSquare(scalar),
+                          avalanche=avalanche(fixed, stringFlips,
+                                              lambda ks: [bitHash(k) for k in ks])),
+        "batch":     dict(chiSquare(batched),
+                          matchesScalar=list(map(int, batched)) == scalar,
+                          avalanche=avalanche(fixed, stringFlips, batch)),
+        "int":       dict(chiSquare(ints),
+                          avalanche=avalanche(randomInts, intFlips,
+                                              lambda ks: [IntHash(k) for k in ks])),
+        "int_batch": dict(chiSquare(intBatched),
+                          matchesScalar=list(map(int, intBatched)) == ints,
+                          avalanche=avalanche(randomInts, intFlips, int_batch)),
+    }
+
+# Time building the table from scratch and mapping it from the cache,
+# using a scratch cache directory so the real cache isn't disturbed.
+def tableLoad():
+    saved = BitHash._CACHE_DIR
+    BitHash._CACHE_DIR = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        BitHash._loadBits(BitHash._SEED, 0)
+        generate = time.perf_counter() - start
+        start = time.perf_counter()
+        BitHash._loadBits(BitHash._SEED, 0)
+        mapped = time.perf_counter() - start
+    finally:
+        shutil.rmtree(BitHash._CACHE_DIR, ignore_errors=True)
+        BitHash._CACHE_DIR = saved
+    return {"generateSeconds": generate, "mapSeconds": mapped}
+
+def runBenchmarks(n = 100000, repeats = 3, avalancheKeys = 1000, seed = 0):
+    rnd = random.Random(seed)
+    # load the table first so the timings don't include it
+    bitHash("")
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__ if numpy is not None else None,
+        "machine": platform.machine(),
+        "keys": n,
+        "repeats": repeats,
+        "tableLoad": tableLoad(),
+        "throughput": throughput(n, repeats, rnd),
+        "quality": quality(n, avalancheKeys, rnd),
+    }
+
+def __main():
+    parser = argparse.ArgumentParser(description="Benchmark BitHash")
+    parser.add_argument("-n", "--keys", type=int, default=100000,
+                        help="number of keys per distribution")
+    parser.add_argument("-r", "--repeats", type=int, default=3,
+                        help="timing runs per measurement (the best is kept)")
+    parser.add_argument("-a", "--avalanche-keys", type=int, default=1000,
+                        help="number of keys used for the avalanche test")
+    parser.add_argument("-o", "--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = runBenchmarks(args.keys, args.repeats, args.avalanche_keys)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    __main()
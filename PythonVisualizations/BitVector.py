@@ -41,7 +41,9 @@ INTRODUCTION:
     supported on bit vectors are:
 
             __add__                for concatenation
+            append, append_bits, extend   for adding bits at the end
             __and__                for bitwise logical AND
+            __iand__, __ior__, __ixor__   for in-place AND, OR and XOR
             __contains__
             __eq__, __ne__, __lt__, __le__, __gt__, __ge__
             __getitem__            for indexed and sliced access
@@ -55,11 +57,17 @@ INTRODUCTION:
             __setitem__            for indexed and sliced setting
             __str__                for str()
             __xor__                for bitwise logical XOR
+            bitwise_and, bitwise_or, bitwise_xor   with an out= target
             close_file_object
+            compact                for a compressed copy of a sparse bit vector
             count_bits 
             count_bits_sparse      faster for sparse bit vectors     
             deep_copy
             divide_into_two
+            fill                   for setting all the bits to 0 or 1
+            find_clear_run         for a run of bits that are not set
+            flush                  for bit vectors from open_mmap
+            frombuffer             for bits in shared memory
             gcd                    for greatest common divisor
             gen_random_bits
             get_bitvector_in_ascii
@@ -71,26 +79,37 @@ INTRODUCTION:
             hamming_distance
             int_val                for returning the integer value 
             is_power_of_2
+            iter_runs              for the runs of 1's and 0's
+            iter_set_bits          for the positions of the 1's
             is_power_of_2_sparse   faster for sparse bit vectors
             jaccard_distance
             jaccard_similarity
             length                 
             min_canonical          for min int value canonical form
             multiplicative_inverse
+            next_clear_bit
             next_set_bit
+            open_mmap              for bit vectors in memory-mapped files
             pad_from_left
             pad_from_right
             permute
+            prev_set_bit
+            rank0, rank1           for counting bits before a position
             rank_of_bit_set_at_index
             read_bits_from_file
+            read_from_file         for reading into an existing bit vector
+            read_view_from_file    for views onto open_mmap files
             reset
             reverse
             runs
+            select1                for the position of the k-th set bit
+            set_range              for setting a range of bits to 0 or 1
             set_value
             shift_left             for non-circular left shift
             shift_right            for non-circular right shift
             test_for_primality
             unpermute
+            view                   for a BitVectorView of a slice
             write_bits_to_stream_object
             write_to_file
 
@@ -210,6 +229,75 @@ CONSTRUCTING BIT VECTORS:
           where sys.argv[1] is meant to supply the name of a public key
           file (in this case an SSH RSA public key file).
 
+    @tagC11
+    (C11) Any of the above constructor calls can also be given a
+          `wordsize' of 16, 32 or 64 to choose the size of the unsigned
+          ints the bits are stored in, as in
+
+            bv = BitVector(size = 1000000, wordsize = 32)
+
+          The default is 64.  The word size makes no difference to what
+          you can do with a bit vector, only to how fast you can do it;
+          the bulk operations go over a bit vector a word at a time.
+
+    @tagC12
+    (C12) To use the memory of an existing object that supports the
+          buffer protocol (a bytearray, an array.array, a memory-mapped
+          file, a NumPy array, ...) as the bits of a bit vector, without
+          copying it, call
+
+            buf = bytearray(1024)
+            bv = BitVector.frombuffer(buf)
+
+          The bit vector is 8 * len(buf) bits long unless you also give
+          a smaller size (the bits of the buffer's last word past size
+          must then be 0).  Bit i of the bit vector is bit i % 8, counting
+          from the least significant end, of byte i // 8 of the buffer
+          (on a little-endian machine; more precisely, bit i % wordsize
+          of word i // wordsize).  Note that this is the opposite of the
+          bit order within each byte used by `rawbytes' in (C10).  Setting
+          bits of the bit vector changes the buffer, and vice versa.  The
+          word size is the largest of 64, 32 and 16 that the length of
+          the buffer is a multiple of, unless you give one with the
+          `wordsize' keyword.  Operations that change the size of the bit
+          vector, such as pad_from_left(), copy its bits into a new
+          array of its own.
+
+    @tagC13
+    (C13) To work on the bits of a file without reading it into memory,
+          map it with
+
+            bv = BitVector.open_mmap('bitmap.bin', 'r+')
+            bv[12345] = 1
+            bv ^= mask
+            bv.close_file_object()
+
+          This is frombuffer() applied to the file mapped into memory with
+          the mmap module, so the bits are laid out as described in (C12),
+          and the operating system reads in only the parts of the file
+          that are used.  The mode is one of
+
+            'r'    the bits can be read but not changed
+            'r+'   changes to the bits are changes to the file
+            'w+'   create the file, or empty it, with room for `size' bits
+            'c'    the bits can be changed, but the file is left as it was
+
+          and `size' and `wordsize' are as for frombuffer().  The file must
+          not be empty, and its length must be a whole number of 16-bit
+          words.  Call flush() to make sure the changes so far are in the
+          file, and close_file_object() when you are done.
+
+          Because the bit order of (C12) is not the most-significant-bit-
+          first order of BitVector(filename = ...), write_to_file() and
+          read_from_file(), a file used with open_mmap() holds its bits
+          differently from a file written by write_to_file(): the two
+          kinds of file are not interchangeable.  Calling
+          read_bits_from_file(n) on a mapped bit vector still reads the
+          next n bits of the file as any other file is read, into a new
+          bit vector.  To get them instead as a BitVectorView (see (3))
+          onto the mapped bits, in the order of (C12) and copying
+          nothing, call read_view_from_file(n).
+
 
 @title   
 OPERATIONS SUPPORTED BY THE BITVECTOR CLASS:
@@ -264,7 +352,20 @@ ACCESSING AND SETTING INDIVIDUAL BITS AND SLICES:
 
         is a bit vector constructed from the bits at index positions from i
         through j-1.  This is made possible by the implementation of the
-        __getitem__ method.
+        __getitem__ method.  The bits are copied a word at a time, so the
+        time taken depends on the length of the slice, not on the length
+        of bv.
+
+        If you would rather not copy the bits at all, call
+
+            view = bv.view(i, j)
+
+        which returns a BitVectorView onto the same bits, sharing the
+        memory of bv.  A view supports len(), indexing (including setting
+        bits, which sets them in bv), iteration, str(), int(), the logical
+        operators (which return new bit vectors), count_bits(), and
+        copy(), which returns the bits as a bit vector of their own.  A
+        view sees any later changes to the bits of bv.
 
     @tag4
     (4) You can also carry out slice assignment:
@@ -279,7 +380,9 @@ ACCESSING AND SETTING INDIVIDUAL BITS AND SLICES:
         of the bit vector bv1 according to the first three bits of bv2.
         The second slice assignment will set the first three bits of bv1
         according to the three bits in bv3.  This is made possible by the
-        slice setting code in the __setitem__ method.
+        slice setting code in the __setitem__ method, which writes the new
+        bits a word at a time, masking the words at the two ends of the
+        slice.  The right hand side may also be a BitVectorView.
 
     @tag5
     (5) You can iterate over a bit vector, as illustrated by
@@ -288,7 +391,25 @@ ACCESSING AND SETTING INDIVIDUAL BITS AND SLICES:
                 print(bit)
 
         This is made possible by the override definition for the special
-        __iter__() method.
+        __iter__() method.  The bits are produced as you go, a word at a
+        time, so iterating over even a very long bit vector takes no
+        extra memory.
+
+        To visit only the bits that are set, call
+
+            for i in bitvec.iter_set_bits():
+                print(i)
+
+        which produces the positions of the 1's in increasing order,
+        skipping over all-zero words.  Similarly,
+
+            for bit, start, stop in bitvec.iter_runs():
+                print(bit, start, stop)
+
+        produces each run of 1's or 0's as the value of its bits and the
+        start and stop positions of the run, so that bitvec[start:stop]
+        is the run.  For a sparse bit vector both take time proportional
+        to the number of 1's rather than to the size of the bit vector.
 
     @tag6
     (6) Negative subscripts for array-like indexing are supported.
@@ -320,6 +441,16 @@ ACCESSING AND SETTING INDIVIDUAL BITS AND SLICES:
         can be thought of as in-place resetting of the bits.  The method
         does not return anything.
 
+        To set or clear just a range of bits, call
+
+            bv1.set_range(i, j, 1)
+            bv1.set_range(i, j, 0)
+
+        which sets the bits at positions i through j-1 to 1 or to 0.  As
+        for slicing, i and j may be negative.  The call bv1.fill(val) does
+        the same for all the bits of bv1.  Both methods, and reset(),
+        write whole words at a time, and return self.
+
 
 @title
 LOGICAL OPERATIONS ON BIT VECTORS:
@@ -334,7 +465,27 @@ LOGICAL OPERATIONS ON BIT VECTORS:
             result_bv  =  ~bv1                # for bitwise negation
 
         These are made possible by implementing the __xor__, __and__,
-        __or__, and __invert__ methods, respectively.
+        __or__, and __invert__ methods, respectively.  If the two bit
+        vectors are not of the same size, the shorter one is treated as
+        if it were padded with zeros from the left.
+
+        The augmented assignments
+
+            bv1 ^= bv2
+            bv1 &= bv2
+            bv1 |= bv2
+
+        change bv1 in place instead of creating a new bit vector.  (If bv2
+        is longer than bv1, bv1 grows to the size of bv2.)  To put the
+        result into some other bit vector you already have, call
+
+            bv1.bitwise_xor(bv2, out = result_bv)
+            bv1.bitwise_and(bv2, out = result_bv)
+            bv1.bitwise_or(bv2, out = result_bv)
+
+        where result_bv must be as long as the longer of bv1 and bv2.
+        Without the out argument, these methods return a new bit vector,
+        just like the operators.
 
 
 @title
@@ -432,7 +583,11 @@ OTHER SUPPORTED OPERATIONS:
 
             int(bitvec)
 
-        As you expect, a call to int_val() returns an integer value.
+        As you expect, a call to int_val() returns an integer value.  The
+        conversion takes time proportional to the size of the bit vector,
+        and its result is remembered until the bits are next changed, so
+        comparing bit vectors with <, <=, > and >= (which compare their
+        integer values) is cheap after the first time.
 
    @tag15
    (15) string representation
@@ -451,6 +606,18 @@ OTHER SUPPORTED OPERATIONS:
         bitvec3 is a new bitvector object that contains all the bits of
         bitvec1 followed by all the bits of bitvec2.
 
+        To add bits to the end of a bit vector in place, call
+
+            bitvec.append(1)                   # a single bit
+            bitvec.append_bits(5, 3)           # the 3-bit field 101
+            bitvec.extend(bitvec2)             # all the bits of bitvec2
+
+        extend() also accepts a BitVectorView or any iterable of 0's and
+        1's.  These methods let the array of words holding the bits grow
+        by more than it needs to each time, so building a bit vector out
+        of a stream of bits or fields takes constant time per bit on
+        average.  All three return the bit vector.
+
    @tag17
    (17) length()
 
@@ -524,7 +691,20 @@ OTHER SUPPORTED OPERATIONS:
 
         The method write_to_file() throws an exception if the size of the
         bitvector on which the method is invoked is not a multiple of 8.
-        This method does not return anything.
+        This method does not return anything.  The bytes are converted
+        and written a megabyte at a time.
+
+        To read the bits back into a bit vector you already have, of a
+        size that is a multiple of 8, call
+
+            FILEIN = open('output.bits', 'rb')
+            nbits = bv.read_from_file(FILEIN)
+
+        which reads the next len(bv) / 8 bytes of the file straight into
+        the memory of bv with readinto(), and returns the number of bits
+        read.  If the file ends first, the rest of the bits of bv are set
+        to 0.  This way even a bit vector of billions of bits is saved or
+        loaded with a handful of system calls.
 
         IMPORTANT FOR WINDOWS USERS: When writing an internally generated
                     bit vector out to a disk file, it is important to open
@@ -543,7 +723,8 @@ OTHER SUPPORTED OPERATIONS:
             bitvec.write_bits_to_stream_object(fp_write)
             print(fp_write.getvalue())   
 
-        This method does not return anything. 
+        This method does not return anything.  The 1's and 0's are written
+        in large strings, not one at a time.
 
    @tag22
    (22) pad_from_left()
@@ -652,7 +833,17 @@ OTHER SUPPORTED OPERATIONS:
         no next set bit is found, the method returns -1.  A call to
         next_set_bit() always returns a number.
 
-   @tag29
+        The related methods
+
+            bv.prev_set_bit(i)         # the last set bit at or before i
+            bv.next_clear_bit(i)       # the first clear bit at or after i
+            bv.find_clear_run(n, i)    # the first run of n clear bits at
+                                       #     or after i
+
+        also return -1 if there is no such bit or run.  All of them skip
+        over whole words of 0's (or, for the clear bit searches, of 1's)
+        at a time, so a bit vector can serve as the bitmap of free blocks
+        in an allocator.
    (29) rank_of_bit_set_at_index()
 
         You can measure the "rank" of a bit that is set at a given
@@ -668,6 +859,21 @@ OTHER SUPPORTED OPERATIONS:
         set at the argument position. Otherwise, it returns the rank as a
         number.
 
+        For many such queries, use
+
+            bv.rank1(i)          # the number of bits set before position i
+            bv.rank0(i)          # the number of bits not set before i
+            bv.select1(k)        # the position of the bit set with k
+                                 #     bits set before it
+
+        The first call to rank1() or select1() builds a directory of the
+        number of bits set before every 2**16 bits and, from there, before
+        every word.  After that rank1() and rank0() take constant time and
+        select1() searches the directory by bisection, until the bits of
+        bv are next changed.  Note that the directory of a bit vector made
+        by frombuffer() or open_mmap() does not see changes made to its
+        memory other than through the bit vector.
+
    @tag30
    (30) is_power_of_2()
         is_power_of_2_sparse()
@@ -809,7 +1015,9 @@ OTHER SUPPORTED OPERATIONS:
            print(str(bv.runs()))                      # ['111', '00', '1']
 
         The object returned by runs() is a list of strings, with each
-        element of this list being a string of 1's and 0's.
+        element of this list being a string of 1's and 0's.  To go
+        through the runs without building their strings, see
+        iter_runs() in (5) above.
 
    @tag39
    (39) gen_random_bits()
@@ -1175,27 +1383,65 @@ INSTALLATION:
 @title
 HOW THE BIT VECTORS ARE STORED:
    
-    The bits of a bit vector are stored in 16-bit unsigned ints
-    following Josiah Carlson's recommendation to that effect on the
-    Pyrex mailing list.  As you can see in the code for `__init__()',
-    after resolving the argument with which the constructor is called,
-    the very first thing the constructor does is to figure out how many
-    of those 2-byte ints it needs for the bits (see how the value is
-    assigned to the variable `two_byte_ints_needed' toward the end of
-    `__init__()').  For example, if you wanted to store a 64-bit array,
-    the variable 'two_byte_ints_needed' would be set to 4. (This does
-    not mean that the size of a bit vector must be a multiple of 16.
-    Any sized bit vectors can be constructed --- the constructor will
-    choose the minimum number of two-byte ints needed.) Subsequently,
-    the constructor acquires an array of zero-initialized 2-byte ints.
-    The last thing that is done in the code for `__init__()' is to
-    shift the bits into the array of two-byte ints.
+    The bits of a bit vector are stored in an array of unsigned ints,
+    or words, of `wordsize' bits each.  Earlier versions of the module
+    always used 16-bit words, following Josiah Carlson's recommendation
+    to that effect on the Pyrex mailing list; the word size is now 64
+    bits unless you ask for 16 or 32 when constructing the bit vector
+    (see (C11) above).  The wider the words, the fewer of them the bulk
+    operations such as the logical operators, count_bits_sparse() and
+    next_set_bit() have to go through.  As you can see in the code for
+    `__init__()', after resolving the argument with which the
+    constructor is called, the very first thing the constructor does is
+    to figure out how many words it needs for the bits.  For example,
+    if you wanted to store a 100-bit array in 64-bit words, it would
+    need 2 words.  (This does not mean that the size of a bit vector
+    must be a multiple of the word size.  Any sized bit vectors can be
+    constructed --- the constructor will choose the minimum number of
+    words needed.)  Subsequently, the constructor acquires an array of
+    zero-initialized words.  The last thing that is done in the code
+    for `__init__()' is to shift the bits into the array of words.
+
+    Bit i of a bit vector is kept in bit i % wordsize (counting from
+    the least significant end) of word i // wordsize.  The bits of the
+    last word beyond the end of the bit vector are always kept at 0, so
+    that the operations that work a whole word at a time never have to
+    treat the last word specially.
+
+    If NumPy is installed, the logical operators and `__invert__()'
+    hand long bit vectors to NumPy, which works directly on the arrays
+    of words without copying them.  NumPy is optional; without it the
+    same operations are carried out a word at a time in Python.
+
+    A bit vector with few bits set, or with its bits in a few long runs,
+    can take much less memory stored some other way.  The module has
+    three classes for this:
+
+        SparseBitVector(size, positions)    the sorted positions of the 1's
+        RunBitVector(size, runs)            the (start, stop) of each run
+                                            of 1's
+        RoaringBitVector(size, positions)   a Roaring bitmap: each 2**16
+                                            bits with any 1's is kept as
+                                            the positions of its 1's, or as
+                                            a BitVector if it has more
+                                            than 4096 of them
+
+    bv.compact() returns the bits of bv in whichever of these should
+    take the least memory, or bv itself if none would take less than
+    half as much.  The three classes support len(), indexing and setting
+    bits, iteration, str(), int(), ==, count_bits(), next_set_bit(),
+    iter_set_bits(), iter_runs(), runs(), deep_copy(), and
+    to_bitvector(), which turns them back into a BitVector.  The logical
+    operators, including ~, work on any mix of them and BitVectors by
+    sweeping over the runs of 1's of both operands, without expanding
+    either into words, and give a result stored as compact() would
+    choose.  Two RoaringBitVectors of the same size are combined 2**16
+    bits at a time instead.
 
     As mentioned above, note that it is not necessary for the size of a
-    bit vector to be a multiple of 16 even though we are using C's
-    unsigned short as as a basic unit for storing the bit arrays.  The
-    class BitVector keeps track of the actual number of bits in the bit
-    vector through the "size" instance variable.
+    bit vector to be a multiple of the word size.  The class BitVector
+    keeps track of the actual number of bits in the bit vector through
+    the "size" instance variable.
 
     Note that, except for one case, the constructor must be called with
     a single keyword argument, which determines how the bit vector will
@@ -1568,13 +1814,151 @@ SOME EXAMPLE CODE:
 
 
 import array
+import bisect
+import heapq
+import itertools
+import mmap
 import operator
 import sys
 
-_hexdict = { '0' : '0000', '1' : '0001', '2' : '0010', '3' : '0011',
-             '4' : '0100', '5' : '0101', '6' : '0110', '7' : '0111',
-             '8' : '1000', '9' : '1001', 'a' : '1010', 'b' : '1011',
-             'c' : '1100', 'd' : '1101', 'e' : '1110', 'f' : '1111' }
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Each byte value with the order of its bits reversed
+_reversed_bytes = bytes( int( '{:08b}'.format(byte)[::-1], 2 ) for byte in range(256) )
+
+# Maps the bytes 0 and 1 to the digits '0' and '1'
+_bit_digits = bytes.maketrans( b'\0\1', b'01' )
+
+# The bits of each byte value, least significant first
+_byte_bits = [ tuple( (byte >> i) & 1 for i in range(8) ) for byte in range(256) ]
+
+# The array typecode for each word size a bit vector can be stored in
+_typecodes = { 16 : 'H', 32 : 'I' if array.array('I').itemsize == 4 else 'L', 64 : 'Q' }
+
+def _typecode(words):
+    'Return the typecode of an array of words, which may be a memoryview of them'
+    return words.typecode if isinstance(words, array.array) else words.format
+
+def _words_to_bytes(words):
+    'Return the bytes of an array of words, least significant byte of each word first'
+    if sys.byteorder == 'big':
+        words = array.array(_typecode(words), words)
+        words.byteswap()
+    return words.tobytes()
+
+def _words_to_int(words, size):
+    '''
+    Return the integer value of the first size bits of an array of words,
+    taking bit 0 (bit 0 of the first word) as the most significant bit.
+    '''
+    data = _words_to_bytes(words).translate(_reversed_bytes)
+    return int.from_bytes(data, 'big') >> (8 * len(data) - size)
+
+def _words_from_int(typecode, value, size):
+    'The inverse of _words_to_int(): return the array of words for value as size bits'
+    words = array.array(typecode)
+    count = (size + 8 * words.itemsize - 1) // (8 * words.itemsize)
+    nbytes = count * words.itemsize
+    data = (value << (8 * nbytes - size)).to_bytes(nbytes, 'big').translate(_reversed_bytes)
+    return _words_from_bytes(typecode, data, count)
+
+# Bit vectors with fewer words than this are faster to combine in Python
+# than by setting up NumPy arrays for them
+_NUMPY_MIN_WORDS = 32
+
+def _numpy_view(words):
+    'Return a NumPy array sharing the memory of an array of words'
+    return numpy.frombuffer(words, dtype=_typecode(words))
+
+# NumPy counts bits (with numpy.bitwise_count, new in NumPy 2.0) this many
+# words at a time when it has to combine two bit vectors first
+_POPCOUNT_BLOCK_WORDS = 1 << 16
+
+_numpy_popcount = numpy is not None and hasattr(numpy, 'bitwise_count')
+
+if hasattr(int, 'bit_count'):
+    _bit_count = int.bit_count
+else:
+    def _bit_count(n):
+        return bin(n).count('1')
+
+def _popcount(words):
+    'Return the number of bits set in an array of words'
+    if _numpy_popcount and len(words) >= _NUMPY_MIN_WORDS:
+        return int(numpy.bitwise_count(_numpy_view(words)).sum())
+    # the order of the bytes doesn't matter when just counting bits
+    return _bit_count(int.from_bytes(words, 'little'))
+
+# The rank directory of a bit vector counts the bits set before each run of
+# 2**16 bits, and from the start of that run to each word
+_RANK_SUPERBLOCK_SHIFT = 16
+
+def _bits_of(words, wordsize, start, stop):
+    '''
+    Return bits start to stop of an array of words as an integer whose bit 0
+    is bit start, reading only the words those bits are in.
+    '''
+    first, last = start // wordsize, (stop + wordsize - 1) // wordsize
+    value = int.from_bytes(_words_to_bytes(words[first:last]), 'little') >> (start - first * wordsize)
+    return value & ((1 << (stop - start)) - 1)
+
+def _words_from_bits(typecode, bits, size):
+    'The inverse of _bits_of(): return the array of words holding the size bits of the integer bits'
+    words = array.array(typecode)
+    count = (size + 8 * words.itemsize - 1) // (8 * words.itemsize)
+    return _words_from_bytes(typecode, bits.to_bytes(count * words.itemsize, 'little'), count)
+
+def _least_rotation(s):
+    '''
+    Return the k for which s[k:] + s[:k] is the least rotation of the string s,
+    by Booth's algorithm.  f is the failure function of the Knuth-Morris-Pratt
+    algorithm for the rotation starting at k, the best found so far.
+    '''
+    s += s
+    f = [-1] * len(s)
+    k = 0
+    for j in range(1, len(s)):
+        c = s[j]
+        i = f[j - k - 1]
+        while i != -1 and c != s[k + i + 1]:
+            if c < s[k + i + 1]:
+                k = j - i - 1
+            i = f[i]
+        if c != s[k + i + 1]:
+            if c < s[k]:
+                k = j
+            f[j - k] = -1
+        else:
+            f[j - k] = i + 1
+    return k
+
+# The bit vector file methods convert and write, or read and convert,
+# this many bytes at a time
+_IO_CHUNK_BYTES = 1 << 20
+
+# The mode of the file and the mmap access for each mode of open_mmap()
+_mmap_modes = {
+    'r':  ('rb', mmap.ACCESS_READ),
+    'r+': ('r+b', mmap.ACCESS_WRITE),
+    'w+': ('w+b', mmap.ACCESS_WRITE),
+    'c':  ('rb', mmap.ACCESS_COPY),
+}
+
+def _words_from_bytes(typecode, data, count):
+    '''
+    Return an array of count words made from bytes laid out as by
+    _words_to_bytes(), zero padded or truncated to fit.
+    '''
+    words = array.array(typecode)
+    nbytes = count * words.itemsize
+    words.frombytes(bytes(data[:nbytes]).ljust(nbytes, b'\0'))
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
 
 def _readblock(blocksize, bitvector):                              
     ''' 
@@ -1586,25 +1970,10 @@ def _readblock(blocksize, bitvector):
     Houghton, a similar feature could presumably be implemented for socket streams by
     using recv() or recvfrom() if you set the flags argument to MSG_PEEK.
     '''
-    global _hexdict                                                  
-    bitstring = ''                                                   
-    i = 0                                                            
-    while ( i < blocksize / 8 ):                                     
-        i += 1                                                       
-        byte = bitvector.FILEIN.read(1)                              
-        if byte == b'':                                              
-            if len(bitstring) < blocksize:                           
-                bitvector.more_to_read = False                      
-            return bitstring                                        
-        if sys.version_info[0] == 3:                                
-            hexvalue = '%02x' % byte[0]                             
-        else:                                                       
-            hexvalue = hex( ord( byte ) )                           
-            hexvalue = hexvalue[2:]                                 
-            if len( hexvalue ) == 1:                                
-                hexvalue = '0' + hexvalue                           
-        bitstring += _hexdict[ hexvalue[0] ]                        
-        bitstring += _hexdict[ hexvalue[1] ]                        
+    data = bitvector.FILEIN.read( blocksize // 8 )
+    if len( data ) < blocksize // 8:
+        bitvector.more_to_read = False
+        return data
     file_pos = bitvector.FILEIN.tell()                              
     # peek at the next byte; moves file position only if a
     # byte is read
@@ -1614,19 +1983,35 @@ def _readblock(blocksize, bitvector):
         bitvector.FILEIN.seek( file_pos )                           
     else:                                                           
         bitvector.more_to_read = False                              
-    return bitstring                                                
+    return data
 
 
 #------------------------------  BitVector Class Definition   --------------------------------
 
 class BitVector( object ):                                           
 
+    # The number of bits in each word of the array self.vector, unless a
+    # different wordsize is given to the constructor
+    wordsize = 64
+
+    # The value of int_val() when it was last called, until the bits change
+    _cached_int = None
+
+    # The directory used by rank1() and select1(), built when one of them is
+    # first called, until the bits change
+    _rank_index = None
+
+    # For a bit vector made by open_mmap(), the mapping of its file, and the
+    # position of the next bit read_bits_from_file() returns
+    _mmap = None
+    _read_pos = 0
+
     def __init__( self, *args, **kwargs ):                           
         if args:                                                     
                raise ValueError(                                     
                       '''BitVector constructor can only be called with keyword arguments for the following keywords: '''
-                      '''filename, fp, size, intVal, bitlist, bitstring, hexstring, textstring, and rawbytes)''')   
-        allowed_keys = 'bitlist','bitstring','filename','fp','intVal', 'size','textstring','hexstring','rawbytes'
+                      '''filename, fp, size, intVal, bitlist, bitstring, hexstring, textstring, rawbytes, and wordsize)''')
+        allowed_keys = 'bitlist','bitstring','filename','fp','intVal', 'size','textstring','hexstring','rawbytes','wordsize'
         keywords_used = kwargs.keys()                               
         for keyword in keywords_used:                               
             if keyword not in allowed_keys:                         
@@ -1641,8 +2026,14 @@ class BitVector( object ):
         if 'hexstring' in kwargs  : hexstring = kwargs.pop('hexstring')      
         if 'textstring' in kwargs : textstring = kwargs.pop('textstring')      
         if 'rawbytes' in kwargs   : rawbytes = kwargs.pop('rawbytes')
+        if 'wordsize' in kwargs:
+            if kwargs['wordsize'] not in _typecodes:
+                raise ValueError("wordsize must be 16, 32 or 64")
+            self.wordsize = kwargs.pop('wordsize')
         self.filename = None                                        
         self.size = 0                                               
+        self._cached_int = None
+        self._rank_index = None
         self.FILEIN = None                                          
         self.FILEOUT = None                                         
         if filename:                                                
@@ -1658,104 +2049,194 @@ class BitVector( object ):
                 raise ValueError('''When fileobject is specified, you cannot give '''
                                  '''values to any other constructor args''')
             bits = self.read_bits_from_fileobject(fp)             
-            bitlist =  list(map(int, bits))                       
-            self.size = len( bitlist )                              
+            self._fill_from_bitstring( ''.join(bits) )
         elif intVal or intVal == 0:                                 
             if filename or fp or bitlist or bitstring or hexstring or textstring or rawbytes:
                 raise ValueError('''When intVal is specified, you can only give a '''
                                  '''value to the 'size' constructor arg''')
-            if intVal == 0:                                         
-                bitlist = [0]                                       
-                if size is None:                                    
-                    self.size = 1                                   
-                elif size == 0:                                     
-                    raise ValueError('''The value specified for size must be at least '''
-                                     '''as large as for the smallest bit vector possible '''
-                                     '''for intVal''')                   
-                else:                                               
-                    if size < len(bitlist):                         
-                        raise ValueError('''The value specified for size must be at least '''
-                                         '''as large as for the smallest bit vector '''
-                                         '''possible for intVal''')
-                    n = size - len(bitlist)                         
-                    bitlist = [0]*n + bitlist                       
-                    self.size = len(bitlist)                      
-            else:                                                   
-                hexVal = hex(intVal).lower().rstrip('l')          
-                hexVal = hexVal[2:]                                 
-                if len(hexVal) == 1:                              
-                    hexVal = '0' + hexVal                           
-                bitlist = ''.join(map(lambda x: _hexdict[x],hexVal))
-                bitlist =  list(map( int, bitlist))                
-                i = 0                                               
-                while (i < len(bitlist)):                       
-                    if bitlist[i] == 1: break                       
-                    i += 1                                          
-                del bitlist[0:i]                                    
-                if size is None:                                    
-                    self.size = len(bitlist)                      
-                elif size == 0:                                     
-                    if size < len(bitlist):                         
-                        raise ValueError('''The value specified for size must be at least '''
-                                         '''as large as for the smallest bit vector possible '''
-                                         '''for intVal''')
-                else:                                               
-                    if size < len(bitlist):                         
-                        raise ValueError('''The value specified for size must be at least '''
-                                         '''as large as for the smallest bit vector possible '''
-                                         '''for intVal''')
-                    n = size - len(bitlist)                         
-                    bitlist = [0]*n + bitlist                       
-                    self.size = len( bitlist )                      
+            intVal = operator.index( intVal )
+            if intVal < 0:
+                raise ValueError("intVal must not be negative")
+            # the shortest possible bit vector for intVal, at least one bit long
+            shortest = max( intVal.bit_length(), 1 )
+            if size is None:
+                size = shortest
+            elif size < shortest:
+                raise ValueError('''The value specified for size must be at least '''
+                                 '''as large as for the smallest bit vector possible '''
+                                 '''for intVal''')
+            self._fill_from_int( intVal, size )
+            self._cached_int = intVal
         elif size is not None and size >= 0:                        
             if filename or fp or intVal or bitlist or bitstring or hexstring or textstring or rawbytes:
                 raise ValueError('''When size is specified (without an intVal), you cannot '''
                                  '''give values to any other constructor args''')
             self.size = size                                        
-            two_byte_ints_needed = (size + 15) // 16                
-            self.vector = array.array('H', [0]*two_byte_ints_needed)
-            return                                                  
+            self.vector = self._zero_words( size )
         elif bitstring or bitstring == '':                          
             if filename or fp or size or intVal or bitlist or hexstring or textstring or rawbytes:
                 raise ValueError('''When a bitstring is specified, you cannot give '''
                                  '''values to any other constructor args''')
-            bitlist =  list(map(int, list(bitstring)))            
-            self.size = len(bitlist)                              
+            self._fill_from_bitstring( bitstring )
         elif bitlist:                                               
             if filename or fp or size or intVal or bitstring or hexstring or textstring or rawbytes:
                 raise ValueError('''When bits are specified, you cannot give values '''
                                  '''to any other constructor args''')
-            self.size = len(bitlist)                              
+            try:
+                bits = bytes( bitlist )
+            except (TypeError, ValueError):
+                raise ValueError( "incorrect value for a bit" )
+            if bits.strip( b'\0\1' ):
+                raise ValueError( "incorrect value for a bit" )
+            self._fill_from_int( int( bits.translate(_bit_digits), 2 ), len(bits) )
         elif textstring or textstring == '':
             if filename or fp or size or intVal or bitlist or bitstring or hexstring or rawbytes:
                 raise ValueError('''When bits are specified through textstring, you '''
                                  '''cannot give values to any other constructor args''')
-            hexlist = ''.join(map(lambda x: x[2:], map(lambda x: hex(x) if len(hex(x)[2:])==2 
-                                 else hex(x)[:2] + '0' + hex(x)[2:], map(ord, list(textstring)))))
-            bitlist = list(map(int,list(''.join(map(lambda x: _hexdict[x], list(hexlist))))))
-            self.size = len(bitlist)                        
+            try:
+                data = textstring.encode( 'latin-1' )
+            except UnicodeEncodeError:
+                # characters past 0xff take up more than one byte's worth of hex digits
+                hexlist = ''.join(map(lambda x: x[2:], map(lambda x: hex(x) if len(hex(x)[2:])==2
+                                     else hex(x)[:2] + '0' + hex(x)[2:], map(ord, list(textstring)))))
+                self._fill_from_int( int(hexlist, 16), 4 * len(hexlist) )
+            else:
+                self._fill_from_bytes( data, 8 * len(data) )
         elif hexstring or hexstring == '':
             if filename or fp or size or intVal or bitlist or bitstring or textstring or rawbytes:
                 raise ValueError('''When bits are specified through hexstring, you '''
                                  '''cannot give values to any other constructor args''')
-            bitlist = list(map(int,list(''.join(map(lambda x: _hexdict[x], list(hexstring.lower()))))))
-            self.size = len(bitlist)                              
+            if hexstring.lower().strip( '0123456789abcdef' ):
+                raise ValueError( "hexstring may only contain hex digits" )
+            # an odd number of digits gets a 0 digit added to make whole
+            # bytes; those four bits fall past the end of the bit vector
+            self._fill_from_bytes( bytes.fromhex( hexstring + '0' * (len(hexstring) % 2) ),
+                                   4 * len(hexstring) )
         elif rawbytes:
             if filename or fp or size or intVal or bitlist or bitstring or textstring or hexstring:
                 raise ValueError('''When bits are specified through rawbytes, you '''
                                  '''cannot give values to any other constructor args''')
-            import binascii
-            hexlist = binascii.hexlify(rawbytes)
-            if sys.version_info[0] == 3:
-                bitlist = list(map(int,list(''.join(map(lambda x: _hexdict[x], list(map(chr,list(hexlist))))))))
-            else:
-                bitlist = list(map(int,list(''.join(map(lambda x: _hexdict[x], list(hexlist))))))
-            self.size = len(bitlist)  
+            data = bytes( rawbytes )
+            self._fill_from_bytes( data, 8 * len(data) )
         else:                                                       
             raise ValueError("wrong arg(s) for constructor")        
-        two_byte_ints_needed = (len(bitlist) + 15) // 16            
-        self.vector = array.array( 'H', [0]*two_byte_ints_needed )  
-        list( map( self._setbit, range(len(bitlist)), bitlist) )    
+
+    @classmethod
+    def frombuffer(cls, buffer, size = None, wordsize = None):
+        '''
+        Return a bit vector whose bits are the memory of buffer, an object that
+        supports the buffer protocol, shared rather than copied.  See (C12) in
+        the module documentation for the details.
+        '''
+        data = memoryview( buffer ).cast( 'B' )
+        if wordsize is None:
+            fits = [ w for w in (64, 32, 16) if len(data) % (w // 8) == 0 ]
+            if not fits:
+                raise ValueError( "buffer length must be a whole number of 16-bit words" )
+            wordsize = fits[0]
+        bv = cls( size = 0, wordsize = wordsize )
+        if size is None:
+            size = 8 * len(data)
+        elif not 0 <= size <= 8 * len(data):
+            raise ValueError( "size must be between 0 and the number of bits in the buffer" )
+        if len(data) % (wordsize // 8):
+            raise ValueError( "buffer length must be a whole number of words" )
+        words = data.cast( _typecodes[wordsize] )
+        bv.vector = words[:(size + wordsize - 1) // wordsize]
+        bv.size = size
+        extra = size % wordsize
+        if extra and bv.vector[-1] >> extra:
+            raise ValueError( "the bits of the buffer's last word past size must be 0" )
+        return bv
+
+    @classmethod
+    def open_mmap(cls, path, mode = 'r', size = None, wordsize = None):
+        '''
+        Return a bit vector whose bits are the contents of the file path,
+        mapped into memory with the mmap module instead of being read.  See
+        (C13) in the module documentation for the modes and the details.
+        '''
+        if mode not in _mmap_modes:
+            raise ValueError( "mode must be one of 'r', 'r+', 'w+' and 'c'" )
+        filemode, access = _mmap_modes[mode]
+        if mode == 'w+' and size is None:
+            raise ValueError( "the size of the bit vector is needed to create its file" )
+        fileobj = open( path, filemode )
+        try:
+            if mode == 'w+':
+                w = wordsize or cls.wordsize
+                fileobj.truncate( (size + w - 1) // w * w // 8 )
+            # if frombuffer() fails, the mapping is closed when it is
+            # garbage collected, with the traceback that still uses it
+            mapped = mmap.mmap( fileobj.fileno(), 0, access = access )
+            bv = cls.frombuffer( mapped, size, wordsize )
+        except:
+            fileobj.close()
+            raise
+        bv.filename = path
+        bv.FILEIN = fileobj
+        bv.more_to_read = True
+        bv._mmap = mapped
+        return bv
+
+    def flush(self):
+        '''
+        Write any changes to the bits of a bit vector made by open_mmap() back
+        to its file.  The changes reach the file anyway when it is closed.
+        '''
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def _fill_from_int(self, value, size):
+        'Make the bits those of the integer value as a bit vector of size bits'
+        self.size = size
+        self.vector = _words_from_int( _typecodes[self.wordsize], value, size )
+
+    def _fill_from_bitstring(self, bitstring):
+        'Make the bits those of a string of 1s and 0s'
+        if bitstring.strip( '01' ):
+            raise ValueError( "incorrect value for a bit" )
+        self._fill_from_int( int(bitstring, 2) if bitstring else 0, len(bitstring) )
+
+    def _fill_from_bytes(self, data, size):
+        '''
+        Make the bits the first size bits of the bytes data, taking the most
+        significant bit of each byte first
+        '''
+        self.size = size
+        count = (size + self.wordsize - 1) // self.wordsize
+        self.vector = _words_from_bytes( _typecodes[self.wordsize], data.translate(_reversed_bytes), count )
+        self._clear_padding()
+
+    def _zero_words(self, size):
+        'Return an array of zeroed words with room for size bits'
+        return array.array( _typecodes[self.wordsize], [0] ) * ((size + self.wordsize - 1) // self.wordsize)
+
+    def _words_of(self, other):
+        '''
+        Return the words of the bit vector other laid out in this bit
+        vector's word size.  Either way, bit i of a bit vector is bit i % 8
+        of byte i // 8 of its words, so changing the word size only means
+        regrouping the bytes.
+        '''
+        if other.wordsize == self.wordsize:
+            return other.vector
+        return _words_from_bytes( _typecodes[self.wordsize], _words_to_bytes(other.vector),
+                                  (other.size + self.wordsize - 1) // self.wordsize )
+
+    def _invalidate(self):
+        '''
+        Forget the cached integer value and rank directory; to be called
+        whenever the bits change
+        '''
+        self._cached_int = None
+        self._rank_index = None
+
+    def _clear_padding(self):
+        'Zero the bits of the last word that lie beyond the end of the bit vector'
+        extra = self.size % self.wordsize
+        if extra:
+            self.vector[-1] &= (1 << extra) - 1
 
     def _setbit(self, posn, val):                                
         'Set the bit at the designated position to the value shown'
@@ -1766,11 +2247,11 @@ class BitVector( object ):
         if  posn >= self.size or posn < -self.size:                
             raise ValueError( "index range error" )                
         if posn < 0: posn = self.size + posn                       
-        block_index = posn // 16                                   
-        shift = posn & 15                                          
+        block_index, shift = divmod( posn, self.wordsize )
         cv = self.vector[block_index]                              
         if ( cv >> shift ) & 1 != val:                             
             self.vector[block_index] = cv ^ (1 << shift)           
+            self._invalidate()
 
     def _getbit(self, pos):                                      
         'Get the bit from the designated position'
@@ -1778,56 +2259,51 @@ class BitVector( object ):
             if  pos >= self.size or pos < -self.size:              
                 raise ValueError( "index range error" )            
             if pos < 0: pos = self.size + pos                      
-            return ( self.vector[pos//16] >> (pos&15) ) & 1        
+            block_index, shift = divmod( pos, self.wordsize )
+            return ( self.vector[block_index] >> shift ) & 1
         else:                                                      
-            slicebits = []
             i,j = pos.start,pos.stop
             if i is None and j is None:                     
                 return self.deep_copy()                              
-            if i is None:
-                if j >= 0:
-                    if j > len(self):
-                        raise ValueError('illegal slice index values')         
-                    for x in range(j):                                         
-                        slicebits.append( self[x] )                              
-                    return BitVector( bitlist = slicebits )                      
-                else:
-                    if abs(j) > len(self):
-                        raise ValueError('illegal slice index values')         
-                    for x in range(len(self) - abs(j)):
-                        slicebits.append( self[x] )                              
-                    return BitVector( bitlist = slicebits )                      
-            if j is None:
-                if i >= 0:
-                    if i > len(self):
-                        raise ValueError('illegal slice index values')         
-                    for x in range(i,len(self)):
-                        slicebits.append( self[x] )                              
-                    return BitVector( bitlist = slicebits )                      
-                else:
-                    if abs(i) > len(self):
-                        raise ValueError('illegal slice index values')         
-                    for x in range(len(self) - abs(i), len(self)):
-                        slicebits.append( self[x] )                              
-                    return BitVector( bitlist = slicebits ) 
-            if (i >= 0 and j >= 0) and i > j:
-                raise ValueError('illegal slice index values')         
-            if (i < 0 and j >= 0) and (len(self) - abs(i)) > j:
-                raise ValueError('illegal slice index values')         
-            if (i >= 0 and j < 0):
-                if len(self) - abs(j) < i:
-                    raise ValueError('illegal slice index values')         
-                else:
-                    for x in range(i, len(self) - abs(j)):
-                        slicebits.append( self[x] )                              
-                    return BitVector( bitlist = slicebits ) 
-            if self.size == 0:                                           
-                return BitVector( bitstring = '' )                       
             if i == j:                                        
-                return BitVector( bitstring = '' )                       
-            for x in range(i,j):                                         
-                slicebits.append( self[x] )                              
-            return BitVector( bitlist = slicebits )                      
+                return BitVector( size = 0 )
+            start, stop = self._slice_bounds( i, j )
+            return self._slice_copy( start, stop )
+
+    def _slice_bounds(self, i, j):
+        '''
+        Return the positions, from 0 to self.size, of the start and stop of the
+        slice [i:j], where i and j may be None or negative
+        '''
+        start = 0 if i is None else i + self.size if i < 0 else i
+        stop = self.size if j is None else j + self.size if j < 0 else j
+        if not 0 <= start <= stop <= self.size:
+            raise ValueError('illegal slice index values')
+        return start, stop
+
+    def _slice_copy(self, start, stop):
+        'Return bits start to stop of this bit vector as a new bit vector'
+        res = BitVector( size = 0, wordsize = self.wordsize )
+        res.size = stop - start
+        res.vector = _words_from_bits( _typecodes[self.wordsize],
+                                       _bits_of(self.vector, self.wordsize, start, stop), stop - start )
+        return res
+
+    def view(self, start = 0, stop = None):
+        '''
+        Return a BitVectorView onto bits start to stop of this bit vector,
+        sharing its memory instead of copying the bits:
+
+            bv = BitVector(bitstring = '0011010011')
+            v = bv.view(2, 6)
+            print(v)                           # 1101
+            print(v.count_bits())              # 3
+
+        start and stop may be negative, counting back from the end, as for
+        slicing.
+        '''
+        start, stop = self._slice_bounds( start, stop )
+        return BitVectorView( self, start, stop )
     
     def __xor__(self, other):                                      
         '''
@@ -1836,19 +2312,9 @@ class BitVector( object ):
         bit vectors are not of the same size, pad the shorter one with zeros from the
         left.
         '''
-        if self.size < other.size:                                  
-            bv1 = self._resize_pad_from_left(other.size - self.size)
-            bv2 = other                                             
-        elif self.size > other.size:                                
-            bv1 = self                                              
-            bv2 = other._resize_pad_from_left(self.size - other.size)
-        else:                                                        
-            bv1 = self                                               
-            bv2 = other                                             
-        res = BitVector( size = bv1.size )                          
-        lpb = map(operator.__xor__, bv1.vector, bv2.vector)         
-        res.vector = array.array( 'H', lpb )                        
-        return res                                                  
+        if isinstance( other, _CompressedBitVector ):
+            return NotImplemented
+        return self._combine( other, operator.__xor__, 'bitwise_xor', None )
 
     def __and__(self, other):                                       
         '''
@@ -1857,19 +2323,9 @@ class BitVector( object ):
         bit vectors are not of the same size, pad the shorter one with zeros from the
         left.
         '''      
-        if self.size < other.size:                                  
-            bv1 = self._resize_pad_from_left(other.size - self.size)
-            bv2 = other                                             
-        elif self.size > other.size:                                
-            bv1 = self                                              
-            bv2 = other._resize_pad_from_left(self.size - other.size)
-        else:                                                        
-            bv1 = self                                               
-            bv2 = other                                             
-        res = BitVector( size = bv1.size )                          
-        lpb = map(operator.__and__, bv1.vector, bv2.vector)         
-        res.vector = array.array( 'H', lpb )                        
-        return res                                                  
+        if isinstance( other, _CompressedBitVector ):
+            return NotImplemented
+        return self._combine( other, operator.__and__, 'bitwise_and', None )
 
     def __or__(self, other):                                        
         '''
@@ -1878,32 +2334,149 @@ class BitVector( object ):
         vectors are not of the same size, pad the shorter one with zero's from the
         left.
         '''
-        if self.size < other.size:                                  
-            bv1 = self._resize_pad_from_left(other.size - self.size)
-            bv2 = other                                             
-        elif self.size > other.size:                                
-            bv1 = self                                              
-            bv2 = other._resize_pad_from_left(self.size - other.size)
-        else:                                                       
-            bv1 = self                                              
-            bv2 = other                                             
-        res = BitVector( size = bv1.size )                          
-        lpb = map(operator.__or__, bv1.vector, bv2.vector)          
-        res.vector = array.array( 'H', lpb )                        
-        return res                                                  
+        if isinstance( other, _CompressedBitVector ):
+            return NotImplemented
+        return self._combine( other, operator.__or__, 'bitwise_or', None )
+
+    def __ixor__(self, other):
+        '''
+        In-place 'XOR': bv1 ^= bv2 changes the words of bv1 itself instead of
+        making a new bit vector.  If bv2 is longer than bv1, bv1 is first padded
+        with zeros from the left to the size of bv2.
+        '''
+        if isinstance( other, _CompressedBitVector ):
+            return NotImplemented
+        self._grow_to( other.size )
+        return self._combine( other, operator.__xor__, 'bitwise_xor', self )
+
+    def __iand__(self, other):
+        '''
+        In-place 'AND': bv1 &= bv2 changes the words of bv1 itself instead of
+        making a new bit vector.  If bv2 is longer than bv1, bv1 is first padded
+        with zeros from the left to the size of bv2.
+        '''
+        if isinstance( other, _CompressedBitVector ):
+            return NotImplemented
+        self._grow_to( other.size )
+        return self._combine( other, operator.__and__, 'bitwise_and', self )
+
+    def __ior__(self, other):
+        '''
+        In-place 'OR': bv1 |= bv2 changes the words of bv1 itself instead of
+        making a new bit vector.  If bv2 is longer than bv1, bv1 is first padded
+        with zeros from the left to the size of bv2.
+        '''
+        if isinstance( other, _CompressedBitVector ):
+            return NotImplemented
+        self._grow_to( other.size )
+        return self._combine( other, operator.__or__, 'bitwise_or', self )
+
+    def bitwise_xor(self, other, out = None):
+        '''
+        The same as self ^ other, except that if out is given the result is
+        written into the bit vector out, which must be as long as the longer of
+        the two operands, instead of into a new bit vector.  out may be one of
+        the operands.  Returns the result.
+        '''
+        return self._combine( other, operator.__xor__, 'bitwise_xor', out )
+
+    def bitwise_and(self, other, out = None):
+        '''
+        The same as self & other, except that if out is given the result is
+        written into the bit vector out, which must be as long as the longer of
+        the two operands, instead of into a new bit vector.  out may be one of
+        the operands.  Returns the result.
+        '''
+        return self._combine( other, operator.__and__, 'bitwise_and', out )
+
+    def bitwise_or(self, other, out = None):
+        '''
+        The same as self | other, except that if out is given the result is
+        written into the bit vector out, which must be as long as the longer of
+        the two operands, instead of into a new bit vector.  out may be one of
+        the operands.  Returns the result.
+        '''
+        return self._combine( other, operator.__or__, 'bitwise_or', out )
 
     def __invert__(self):                                           
         '''
         Invert the bits in the bit vector on which the method is invoked
         and return the result as a new bit vector.
         '''
-        res = BitVector( size = self.size )                         
-        lpb = list(map( operator.__inv__, self.vector ))            
-        res.vector = array.array( 'H' )                             
-        for i in range(len(lpb)):                                   
-            res.vector.append( lpb[i] & 0x0000FFFF )                
+        res = BitVector( size = self.size, wordsize = self.wordsize )
+        if numpy is not None and len(self.vector) >= _NUMPY_MIN_WORDS:
+            numpy.invert( _numpy_view(self.vector), out = _numpy_view(res.vector) )
+        else:
+            mask = (1 << self.wordsize) - 1
+            res.vector = array.array( _typecode(res.vector), [word ^ mask for word in self.vector] )
+        res._clear_padding()
         return res                                                  
 
+    def _combine(self, other, op, ufunc, out):
+        '''
+        Apply op to the words of this bit vector and other, the shorter of the
+        two padded with zeros from the left, putting the result in the bit vector
+        out, or in a new bit vector in this bit vector's word size if out is
+        None.  When NumPy is available and the bit vectors are long enough, the
+        NumPy function named ufunc does the work instead.  The padding is never
+        actually made: the words of the longer operand are combined in place
+        with the words of the shorter one, shifted to line up with them.
+        A compressed bit vector, which only the bitwise_*() methods pass in,
+        is expanded into an ordinary one first.
+        '''
+        if isinstance( other, BitVectorView ):
+            other = other.copy()
+        elif isinstance( other, _CompressedBitVector ):
+            other = other.to_bitvector( self.wordsize )
+        size = max( self.size, other.size )
+        if out is None:
+            out = BitVector( size = size, wordsize = self.wordsize )
+        elif out.size != size:
+            raise ValueError( "out must be as long as the longer operand" )
+        longer, shorter = (self, other) if self.size >= other.size else (other, self)
+        if shorter is out:
+            # only possible when the sizes are equal
+            longer, shorter = shorter, longer
+        out._invalidate()
+        if longer is not out:
+            memoryview( out.vector )[:] = out._words_of( longer )
+        words, start = out._padded_words( shorter, size )
+        vector = out.vector
+        if numpy is not None and len(vector) >= _NUMPY_MIN_WORDS:
+            view = _numpy_view( vector )
+            getattr(numpy, ufunc)( view[start:], _numpy_view(words), out = view[start:] )
+            if op is operator.__and__:
+                view[:start] = 0
+        else:
+            typecode = _typecode( vector )
+            vector[start:] = array.array( typecode, map(op, vector[start:], words) )
+            if op is operator.__and__:
+                vector[:start] = array.array( typecode, [0] ) * start
+        return out
+
+    def _padded_words(self, bv, size):
+        '''
+        Return the words, in this bit vector's word size, of the bit vector bv
+        padded with zeros from the left to size bits, as a pair (words, start)
+        meaning start zero words followed by words.  When the padding is a whole
+        number of words, words is bv's own array (if the word sizes match).
+        '''
+        w = self.wordsize
+        start, shift = divmod( size - bv.size, w )
+        if shift == 0:
+            return self._words_of( bv ), start
+        bits = _bits_of( bv.vector, bv.wordsize, 0, bv.size ) << shift
+        return _words_from_bits( _typecodes[w], bits, size - start * w ), start
+
+    def _grow_to(self, size):
+        'Pad this bit vector in place with zeros from the left until it has size bits'
+        if size > self.size:
+            words, start = self._padded_words( self, size )
+            self.vector = self._zero_words( size )
+            memoryview( self.vector )[start:] = words
+            self.size = size
+            self._invalidate()
+
     def __add__(self, other):                                       
         '''
         Because __add__ is supplied, you can always join two bitvectors by
@@ -1913,16 +2486,79 @@ class BitVector( object ):
         bitvec3 is a new bitvector object that contains all the bits of
         bitvec1 followed by all the bits of bitvec2.
         '''
-        i = 0                                                       
-        outlist = []                                                
-        while i < self.size:                                    
-            outlist.append(self[i])                               
-            i += 1                                                  
-        i = 0                                                       
-        while i < other.size:                                   
-            outlist.append( other[i] )                              
-            i += 1                                                  
-        return BitVector( bitlist = outlist )                       
+        return self.deep_copy().extend( other )
+
+    def _reserve(self, size):
+        '''
+        Make sure the array of words has room for size bits.  Extending an
+        array.array over-allocates, so growing a bit vector a little at a
+        time costs amortized constant time per word.  A bit vector sharing
+        memory through frombuffer() is first given an array of its own.
+        '''
+        if not isinstance( self.vector, array.array ):
+            self.vector = array.array( _typecode(self.vector), self.vector )
+        extra = (size + self.wordsize - 1) // self.wordsize - len(self.vector)
+        if extra > 0:
+            self.vector.extend( self._zero_words(extra * self.wordsize) )
+
+    def append(self, bit):
+        '''
+        Add the bit, 0 or 1, to the end of this bit vector.  Returns self.
+        '''
+        if bit not in (0, 1):
+            raise ValueError( "incorrect value for a bit" )
+        pos = self.size
+        self._reserve( pos + 1 )
+        self.size = pos + 1
+        if bit:
+            block_index, shift = divmod( pos, self.wordsize )
+            self.vector[block_index] |= 1 << shift
+        self._invalidate()
+        return self
+
+    def append_bits(self, value, nbits):
+        '''
+        Add the non-negative integer value, as a field of nbits bits with its
+        most significant bit first, to the end of this bit vector.  Returns
+        self:
+
+            bv = BitVector(bitstring = '11')
+            bv.append_bits(5, 4)               # 110101
+        '''
+        value = operator.index( value )
+        if nbits < 0 or value < 0 or value >> nbits:
+            raise ValueError( "the value does not fit in %d bits" % nbits )
+        if nbits:
+            start = self.size
+            self._reserve( start + nbits )
+            self.size = start + nbits
+            self._write_bits( start, self.size, int( format(value, '0%db' % nbits)[::-1], 2 ) )
+        return self
+
+    def extend(self, other):
+        '''
+        Add the bits of other, which may be a BitVector, a BitVectorView or
+        an iterable of 0's and 1's, to the end of this bit vector.  If this
+        bit vector ends on a word boundary the words of other are copied
+        across whole.  Returns self.
+        '''
+        if isinstance( other, BitVectorView ):
+            other = other.copy()
+        elif not isinstance( other, BitVector ):
+            bits = list( other )
+            other = BitVector( bitlist = bits ) if bits else BitVector( size = 0 )
+        start = self.size
+        if start % self.wordsize == 0:
+            self._reserve( start )
+            # a copy of the bytes, as other may be this bit vector
+            self.vector.frombytes( self._words_of(other).tobytes() )
+            self.size = start + other.size
+            self._invalidate()
+        elif other.size:
+            self._reserve( start + other.size )
+            self.size = start + other.size
+            self._write_bits( start, self.size, _bits_of(other.vector, other.wordsize, 0, other.size) )
+        return self
 
     def _getsize(self):                                             
         'Return the number of bits in a bit vector.'
@@ -1969,11 +2605,75 @@ class BitVector( object ):
             raise SyntaxError( error_str )                          
         if blocksize % 8 != 0:                                      
             raise ValueError( "block size must be a multiple of 8" )
-        bitstr = _readblock( blocksize, self )                      
-        if len( bitstr ) == 0:                                      
+        if self._mmap is not None:
+            # the file's bytes are taken most significant bit first, as
+            # for any other file, not in the bit order of the mapping
+            start, stop = self._next_mapped_block( blocksize )
+            data = self._mmap[start // 8:(stop + 7) // 8]
+            if not data:
+                return BitVector( size = 0 )
+            bv = BitVector( rawbytes = data )
+            return bv if stop % 8 == 0 else bv[:stop - start]
+        data = _readblock( blocksize, self )
+        if len( data ) == 0:
             return BitVector( size = 0 )                            
         else:                                                       
-            return BitVector( bitstring = bitstr )                  
+            return BitVector( rawbytes = data )
+
+    def read_view_from_file(self, blocksize):
+        '''
+        For a bit vector made by open_mmap(), return the next blocksize bits
+        of the mapped file as a BitVectorView (see (3)), copying nothing.
+        The bits are in the order described in (C12), that of the mapping
+        itself, so they are not the bits that read_bits_from_file() returns
+        for the same part of the file.  Reading with either method moves on
+        the same position in the file.
+        '''
+        if self._mmap is None:
+            raise SyntaxError( "You need to first construct a BitVector object with open_mmap()" )
+        if blocksize % 8 != 0:
+            raise ValueError( "block size must be a multiple of 8" )
+        return self.view( *self._next_mapped_block( blocksize ) )
+
+    def _next_mapped_block(self, blocksize):
+        'Return the start and stop of the next block of a mapped file to read'
+        start = self._read_pos
+        self._read_pos = min( start + blocksize, self.size )
+        if self._read_pos == self.size:
+            self.more_to_read = False
+        return start, self._read_pos
+
+    def read_from_file(self, file_in):
+        '''
+        The counterpart of write_to_file(): fill this bit vector, whose size
+        must be a multiple of 8, with the next len(self) / 8 bytes of the
+        binary file file_in, taking the most significant bit of each byte
+        first.  The bytes are read straight into the words of the bit
+        vector with readinto().  Returns the number of bits read; if the
+        file ends first, the rest of the bits are set to 0.
+        '''
+        if self.size % 8:
+            raise ValueError( "Only a bit vector whose length is a multiple of 8 can be read from a file" )
+        nbytes = self.size // 8
+        data = memoryview( self.vector ).cast( 'B' )[:nbytes]
+        got = 0
+        while got < nbytes:
+            n = file_in.readinto( data[got:] )
+            if not n:
+                break
+            got += n
+        for i in range( 0, got, _IO_CHUNK_BYTES ):
+            j = min( i + _IO_CHUNK_BYTES, got )
+            data[i:j] = data[i:j].tobytes().translate( _reversed_bytes )
+        data.release()
+        if sys.byteorder == 'big':
+            # the bytes of each word are in file order; put them in ours
+            words = array.array( _typecode(self.vector), self.vector )
+            words.byteswap()
+            memoryview( self.vector )[:] = words
+        self.set_range( 8 * got, self.size, 0 )
+        self._invalidate()
+        return 8 * got
 
     def read_bits_from_fileobject( self, fp ):                      
         '''
@@ -2006,17 +2706,11 @@ class BitVector( object ):
         especially if you use the StringIO class, as shown in the test
         code.
         '''
-        for bit_index in range(self.size):                          
-            if sys.version_info[0] == 3:                            
-                if self[bit_index] == 0:                            
-                    fp.write( str('0') )                            
-                else:                                               
-                    fp.write( str('1') )                            
-            else:                                                   
-                if self[bit_index] == 0:                            
-                    fp.write( unicode('0') )                        
-                else:                                               
-                    fp.write( unicode('1') )                        
+        step = 8 * _IO_CHUNK_BYTES
+        for start in range( 0, self.size, step ):
+            stop = min( start + step, self.size )
+            bits = _bits_of( self.vector, self.wordsize, start, stop )
+            fp.write( format( bits, '0%db' % (stop - start) )[::-1] )
 
     write_bits_to_fileobject = write_bits_to_stream_object
 
@@ -2033,17 +2727,9 @@ class BitVector( object ):
         '''
         if self.size % 2 != 0:                                     
             raise ValueError( "must have even num bits" )          
-        i = 0                                                      
-        outlist1 = []                                              
-        while ( i < self.size /2 ):                                
-            outlist1.append( self[i] )                             
-            i += 1                                                 
-        outlist2 = []                                              
-        while ( i < self.size ):                                   
-            outlist2.append( self[i] )                             
-            i += 1                                                 
-        return [ BitVector( bitlist = outlist1 ),
-                 BitVector( bitlist = outlist2 ) ]                 
+        half = self.size // 2
+        return [ self._slice_copy( 0, half ),
+                 self._slice_copy( half, self.size ) ]
 
     def permute(self, permute_list):                               
         '''
@@ -2115,14 +2801,12 @@ class BitVector( object ):
             self.FILEOUT = file_out                                 
         if self.size % 8:                                           
             raise ValueError( err_str )                             
-        for byte in range( int(self.size/8) ):                      
-            value = 0                                               
-            for bit in range(8):                                    
-                value += (self._getbit( byte*8+(7 - bit) ) << bit ) 
-            if sys.version_info[0] == 3:                            
-                file_out.write( bytes([value]) )        
-            else:                                                   
-                file_out.write( chr(value) )                        
+        nbytes = self.size // 8
+        step = _IO_CHUNK_BYTES // (self.wordsize // 8)
+        for i in range( 0, len(self.vector), step ):
+            data = _words_to_bytes( self.vector[i:i+step] )
+            end = nbytes - i * self.wordsize // 8
+            file_out.write( data[:end].translate( _reversed_bytes ) )
 
     def close_file_object(self):                                    
         '''
@@ -2137,17 +2821,32 @@ class BitVector( object ):
         The constructor call in the first statement creates a file object
         for reading the bits.  It is this file object that is closed when
         you call close_file_object().
+
+        For a bit vector made by open_mmap(), this also writes any changes
+        back to the file and unmaps it, leaving the bit vector empty.
         '''
         if not self.FILEIN:                                         
             raise SyntaxError( "No associated open file" )          
+        if self._mmap is not None:
+            if isinstance( self.vector, memoryview ):
+                self.vector.release()
+            self.vector = self._zero_words( 0 )
+            self.size = 0
+            self._invalidate()
+            self._mmap.close()
+            self._mmap = None
         self.FILEIN.close()                                         
 
     def int_val(self):                                             
         'Return the integer value of a bitvector'
-        intVal = 0                                                  
-        for i in range(self.size):                                  
-            intVal += self[i] * (2 ** (self.size - i - 1))          
-        return intVal                                               
+        if self._cached_int is not None:
+            return self._cached_int
+        value = _words_to_int( self.vector, self.size )
+        # the memory of a bit vector made by frombuffer() can be changed
+        # behind its back, so its value is never cached
+        if isinstance( self.vector, array.array ):
+            self._cached_int = value
+        return value
 
     intValue = int_val
 
@@ -2171,7 +2870,8 @@ class BitVector( object ):
         if self.size % 8:                                           
             raise ValueError('''\nThe bitvector for get_bitvector_in_ascii() 
                                   must be an integral multiple of 8 bits''')
-        return ''.join(map(chr, map(int,[self[i:i+8] for i in range(0,self.size,8)])))
+        # chr() of each byte value is its latin-1 character
+        return self.int_val().to_bytes( self.size // 8, 'big' ).decode( 'latin-1' )
 
     # For backward compatibility:
     get_text_from_bitvector = get_bitvector_in_ascii
@@ -2196,8 +2896,9 @@ class BitVector( object ):
         if self.size % 4:                                           
             raise ValueError('''\nThe bitvector for get_bitvector_in_hex() '''
                              '''must be an integral multiple of 4 bits''')
-        return ''.join(map(lambda x: x.replace('0x',''), \
-                       map(hex,map(int,[self[i:i+4] for i in range(0,self.size,4)]))))
+        if self.size == 0:
+            return ''
+        return format( self.int_val(), '0%dx' % (self.size // 4) )
 
     # For backward compatibility:
     get_hex_string_from_bitvector = get_bitvector_in_hex
@@ -2221,8 +2922,10 @@ class BitVector( object ):
                                 makes no sense''')                 
         if n < 0:                                                  
             return self >> abs(n)                                  
-        for i in range(n):                                         
-            self.circular_rotate_left_by_one()                     
+        n %= self.size
+        if n:
+            bits = _bits_of( self.vector, self.wordsize, 0, self.size )
+            self._write_bits( 0, self.size, (bits >> n) | (bits << (self.size - n)) )
         return self                                                
 
     def __rshift__( self, n ):                                     
@@ -2241,36 +2944,42 @@ class BitVector( object ):
             raise ValueError('''Circular shift of an empty vector makes no sense''')                 
         if n < 0:                                                  
             return self << abs(n)                                  
-        for i in range(n):                                         
-            self.circular_rotate_right_by_one()                    
+        n %= self.size
+        if n:
+            bits = _bits_of( self.vector, self.wordsize, 0, self.size )
+            self._write_bits( 0, self.size, (bits << n) | (bits >> (self.size - n)) )
         return self                                                
 
     def circular_rotate_left_by_one(self):                         
         'For a one-bit in-place left circular shift'
         size = len(self.vector)                                    
+        top = self.wordsize - 1
         bitstring_leftmost_bit = self.vector[0] & 1                
         left_most_bits = list(map(operator.__and__, self.vector, [1]*size)) 
         left_most_bits.append(left_most_bits[0])                   
         del(left_most_bits[0])                                     
-        self.vector = list(map(operator.__rshift__, self.vector, [1]*size)) 
-        self.vector = list(map( operator.__or__, self.vector, \
-                              list( map(operator.__lshift__, left_most_bits, [15]*size) )))   
-                                                                   
+        words = list(map(operator.__rshift__, self.vector, [1]*size))
+        self.vector[:] = array.array( _typecode(self.vector), map( operator.__or__, words, \
+                              list( map(operator.__lshift__, left_most_bits, [top]*size) )))
+        self._clear_padding()
+        self._invalidate()
         self._setbit(self.size -1, bitstring_leftmost_bit)         
 
     def circular_rotate_right_by_one(self):                        
         'For a one-bit in-place right circular shift'
         size = len(self.vector)                                    
+        top = self.wordsize - 1
         bitstring_rightmost_bit = self[self.size - 1]              
         right_most_bits = list(map( operator.__and__,
-                               self.vector, [0x8000]*size ))       
-        self.vector = list(map( operator.__and__, self.vector, [~0x8000]*size ))
+                               self.vector, [1 << top]*size ))
+        words = list(map( operator.__and__, self.vector, [~(1 << top)]*size ))
         right_most_bits.insert(0, bitstring_rightmost_bit)         
         right_most_bits.pop()                                      
-        self.vector = list(map(operator.__lshift__, self.vector, [1]*size))
-        self.vector = list(map( operator.__or__, self.vector, \
-                                list(map(operator.__rshift__, right_most_bits, [15]*size))))  
-                                                                   
+        words = list(map(operator.__lshift__, words, [1]*size))
+        self.vector[:] = array.array( _typecode(self.vector), map( operator.__or__, words, \
+                                list(map(operator.__rshift__, right_most_bits, [top]*size))))
+        self._clear_padding()
+        self._invalidate()
         self._setbit(0, bitstring_rightmost_bit)                   
 
     def circular_rot_left(self):                                   
@@ -2280,13 +2989,14 @@ class BitVector( object ):
         functions.  This method carries out a one-bit left circular shift of a bit
         vector.
         '''
-        max_index = (self.size -1)  // 16                       
+        max_index = (self.size -1)  // self.wordsize
         left_most_bit = self.vector[0] & 1                      
         self.vector[0] = self.vector[0] >> 1                    
         for i in range(1, max_index + 1):                       
             left_bit = self.vector[i] & 1                       
             self.vector[i] = self.vector[i] >> 1                
-            self.vector[i-1] |= left_bit << 15                  
+            self.vector[i-1] |= left_bit << (self.wordsize - 1)
+        self._invalidate()
         self._setbit(self.size -1, left_most_bit)               
 
     def circular_rot_right(self):                               
@@ -2295,15 +3005,18 @@ class BitVector( object ):
         circular_rotate_right_by_one() shown above.  This one does NOT use map
         functions.  This method does a one-bit right circular shift of a bit vector.
         '''
-        max_index = (self.size -1)  // 16                       
+        max_index = (self.size -1)  // self.wordsize
+        top = self.wordsize - 1
         right_most_bit = self[self.size - 1]                    
-        self.vector[max_index] &= ~0x8000                       
+        self.vector[max_index] &= ~(1 << top)
         self.vector[max_index] = self.vector[max_index] << 1    
         for i in range(max_index-1, -1, -1):                    
-            right_bit = self.vector[i] & 0x8000                 
-            self.vector[i] &= ~0x8000                           
+            right_bit = self.vector[i] & (1 << top)
+            self.vector[i] &= ~(1 << top)
             self.vector[i] = self.vector[i] << 1                
-            self.vector[i+1] |= right_bit >> 15                 
+            self.vector[i+1] |= right_bit >> top
+        self._clear_padding()
+        self._invalidate()
         self._setbit(0, right_most_bit)                         
 
     def shift_left_by_one(self):                                
@@ -2314,12 +3027,15 @@ class BitVector( object ):
         zero.
         '''
         size = len(self.vector)                                 
+        top = self.wordsize - 1
         left_most_bits = list(map(operator.__and__, self.vector, [1]*size))  
         left_most_bits.append(left_most_bits[0])                    
         del(left_most_bits[0])                                      
-        self.vector = list(map(operator.__rshift__, self.vector, [1]*size)) 
-        self.vector = list(map( operator.__or__, self.vector, \
-                               list(map(operator.__lshift__, left_most_bits, [15]*size))))
+        words = list(map(operator.__rshift__, self.vector, [1]*size))
+        self.vector[:] = array.array( _typecode(self.vector), map( operator.__or__, words, \
+                               list(map(operator.__lshift__, left_most_bits, [top]*size))))
+        self._clear_padding()
+        self._invalidate()
         self._setbit(self.size -1, 0)                                
 
     def shift_right_by_one(self):                                    
@@ -2330,13 +3046,16 @@ class BitVector( object ):
         zero.
         '''
         size = len(self.vector)                                      
-        right_most_bits = list(map( operator.__and__, self.vector, [0x8000]*size ))         
-        self.vector = list(map( operator.__and__, self.vector, [~0x8000]*size )) 
+        top = self.wordsize - 1
+        right_most_bits = list(map( operator.__and__, self.vector, [1 << top]*size ))
+        words = list(map( operator.__and__, self.vector, [~(1 << top)]*size ))
         right_most_bits.insert(0, 0)                                 
         right_most_bits.pop()                                        
-        self.vector = list(map(operator.__lshift__, self.vector, [1]*size))    
-        self.vector = list(map( operator.__or__, self.vector, \
-                                   list(map(operator.__rshift__,right_most_bits, [15]*size))))
+        words = list(map(operator.__lshift__, words, [1]*size))
+        self.vector[:] = array.array( _typecode(self.vector), map( operator.__or__, words, \
+                                   list(map(operator.__rshift__,right_most_bits, [top]*size))))
+        self._clear_padding()
+        self._invalidate()
         self._setbit(0, 0)                                           
 
     def shift_left( self, n ):                                       
@@ -2347,8 +3066,10 @@ class BitVector( object ):
         zeros. This method returns the bitvector object on which it is
         invoked.  This is to allow for chained invocations of the method.
         '''
-        for i in range(n):                                           
-            self.shift_left_by_one()                                 
+        if n >= self.size:
+            return self.fill( 0 )
+        if n > 0:
+            self._write_bits( 0, self.size, _bits_of(self.vector, self.wordsize, n, self.size) )
         return self                                                  
 
     def shift_right( self, n ):                                      
@@ -2359,8 +3080,10 @@ class BitVector( object ):
         zeros. This method returns the bitvector object on which it is
         invoked.  This is to allow for chained invocations of the method.
         '''
-        for i in range(n):                                           
-            self.shift_right_by_one()                                
+        if n >= self.size:
+            return self.fill( 0 )
+        if n > 0:
+            self._write_bits( 0, self.size, _bits_of(self.vector, self.wordsize, 0, self.size - n) << n )
         return self                                                  
 
     # Allow array like subscripting for getting and setting:
@@ -2375,54 +3098,68 @@ class BitVector( object ):
         '''      
         # The following section is for slice assignment:
         if isinstance(pos, slice):                                 
+            if isinstance( item, BitVectorView ):
+                item = item.copy()
             if (not isinstance( item, BitVector )):                  
                 raise TypeError("For slice assignment, the right hand side must be a BitVector")    
-            if (pos.start is None and pos.stop is None):                     
-                return item.deep_copy()                              
-            if pos.start is None:                                      
-                if pos.stop >= 0:
-                    if pos.stop != len(item):                         
-                        raise ValueError('incompatible lengths for slice assignment 1')   
-                    for i in range(pos.stop):                           
-                        self[i] = item[i]                             
-                else:
-                    if len(self) - abs(pos.stop) != len(item):                                         
-                        raise ValueError('incompatible lengths for slice assignment 2')   
-                    for i in range(len(self) + pos.stop):                                
-                        self[i] = item[i]                             
-                return
-            if pos.stop is None:                                      
-                if pos.start >= 0:
-                    if ((len(self) - pos.start) != len(item)):          
-                        raise ValueError('incompatible lengths for slice assignment 3')   
-                    for i in range(len(item)-1):                        
-                        self[pos.start + i] = item[i]                 
-                else:
-                    if abs(pos.start) != len(item): 
-                        raise ValueError('incompatible lengths for slice assignment 4')   
-                    for i in range(len(item)):
-                        self[len(self) + pos.start + i] = item[i]                 
-                return
-            if pos.start >=0 and pos.stop < 0:
-                if ( (len(self) + pos.stop - pos.start) != len(item) ):                          
-                    raise ValueError('incompatible lengths for slice assignment 5')   
-                for i in range( pos.start, len(self) + pos.stop ):              
-                    self[i] = item[ i - pos.start ]                 
-                return
-            if pos.start < 0 and pos.stop >= 0:
-                if ( (len(self) - pos.stop + pos.start) != len(item) ):                          
-                    raise ValueError('incompatible lengths for slice assignment 6')   
-                for i in range( len(self) + pos.start, pos.stop ):              
-                    self[i] = item[ i - pos.start ]                 
-                return
-            if ( (pos.stop - pos.start) != len(item) ):         
-                raise ValueError('incompatible lengths for slice assignment 7')   
-            for i in range( pos.start, pos.stop ):              
-                self[i] = item[ i - pos.start ]                 
+            start, stop = self._slice_bounds( pos.start, pos.stop )
+            if stop - start != len(item):
+                raise ValueError('incompatible lengths for slice assignment')
+            if start < stop:
+                self._write_bits( start, stop, _bits_of(item.vector, item.wordsize, 0, item.size) )
             return                                              
         # For index assignment use _setbit()
         self._setbit(pos, item)                                   
 
+    def _write_bits(self, start, stop, bits):
+        '''
+        Overwrite bits start to stop with the low bits of the integer bits,
+        whose bit 0 goes to position start, rewriting only the words those
+        bits are in
+        '''
+        w = self.wordsize
+        first, last = start // w, (stop + w - 1) // w
+        shift = start - first * w
+        mask = ((1 << (stop - start)) - 1) << shift
+        old = int.from_bytes( _words_to_bytes(self.vector[first:last]), 'little' )
+        memoryview(self.vector)[first:last] = _words_from_bits( _typecode(self.vector),
+                                                   (old & ~mask) | ((bits << shift) & mask), (last - first) * w )
+        self._invalidate()
+
+    def set_range(self, i, j, val):
+        '''
+        Sets the bits at positions i through j-1 to val, which must be 0 or 1.
+        As for slicing, i and j may be negative or None.  The words wholly
+        inside the range are written whole.  Returns self:
+
+            bv = BitVector(size = 12)
+            bv.set_range(3, 9, 1)              # 000111111000
+        '''
+        if val not in (0,1):
+            raise ValueError( "incorrect value for a bit" )
+        start, stop = self._slice_bounds( i, j )
+        w = self.wordsize
+        first, last = -(-start // w), stop // w
+        if first >= last:
+            if start < stop:
+                self._write_bits( start, stop, -val & ((1 << (stop - start)) - 1) )
+            return self
+        memoryview(self.vector)[first:last] = array.array( _typecode(self.vector),
+                                                           [-val & ((1 << w) - 1)] ) * (last - first)
+        if start < first * w:
+            self._write_bits( start, first * w, -val & ((1 << (first * w - start)) - 1) )
+        if last * w < stop:
+            self._write_bits( last * w, stop, -val & ((1 << (stop - last * w)) - 1) )
+        self._invalidate()
+        return self
+
+    def fill(self, val):
+        '''
+        Sets all the bits to val, which must be 0 or 1, a word at a time.
+        Returns self.
+        '''
+        return self.set_range( 0, self.size, val )
+
     # Allow len() to work:
     __len__ = _getsize                                               
     # Allow int() to work:
@@ -2433,16 +3170,103 @@ class BitVector( object ):
         To allow iterations over a bit vector by supporting the 'for bit in
         bit_vector' syntax:
         '''
-        return BitVectorIterator(self)                             
+        return itertools.islice( self._iter_words(), self.size )
+
+    def _iter_words(self):
+        '''
+        Generate the bits of all the words of this bit vector, including the
+        zero bits past its end, decoding one word at a time.
+        '''
+        nbytes = self.wordsize // 8
+        for word in self.vector:
+            for byte in word.to_bytes( nbytes, 'little' ):
+                yield from _byte_bits[byte]
+
+    def iter_set_bits(self):
+        '''
+        Generate the positions of the bits that are set, in increasing order:
+
+            bv = BitVector(bitstring = '0100000001')
+            print(list(bv.iter_set_bits()))             # [1, 9]
+
+        All-zero words are skipped without being looked at in Python, so
+        this takes time proportional to the number of bits set.
+        '''
+        v, w = self.vector, self.wordsize
+        for i in itertools.compress( range(len(v)), v ):
+            word = v[i]
+            base = i * w
+            while word:
+                low = word & -word
+                yield base + low.bit_length() - 1
+                word ^= low
+
+    def _iter_one_runs(self):
+        '''
+        Generate a (start, stop) pair for each run of 1's, skipping over
+        all-zero words.  A run that reaches the end of a word is held back
+        until we know whether it carries on into the next word.
+        '''
+        v, w = self.vector, self.wordsize
+        run_start = None
+        last = -1
+        for i in itertools.compress( range(len(v)), v ):
+            if run_start is not None and i != last + 1:
+                yield run_start, (last + 1) * w
+                run_start = None
+            word = v[i]
+            base = pos = i * w
+            while word:
+                zeros = (word & -word).bit_length() - 1
+                word >>= zeros
+                ones = (word ^ (word + 1)).bit_length() - 1
+                word >>= ones
+                start, pos = pos + zeros, pos + zeros + ones
+                if run_start is not None:
+                    if start == base:
+                        start = run_start
+                    else:
+                        yield run_start, base
+                    run_start = None
+                if pos == base + w:
+                    run_start = start
+                else:
+                    yield start, pos
+            last = i
+        if run_start is not None:
+            yield run_start, (last + 1) * w
+
+    def iter_runs(self):
+        '''
+        Generate the runs of 1's and 0's in the bit vector as triples (bit,
+        start, stop), where bit is the value of the bits in the run and the run
+        is the slice [start:stop]:
+
+            bv = BitVector(bitstring = '1110010')
+            print(list(bv.iter_runs()))      # [(1, 0, 3), (0, 3, 5), (1, 5, 6), (0, 6, 7)]
+
+        As with iter_set_bits(), all-zero words are skipped over, so long runs
+        of 0's cost next to nothing.
+        '''
+        pos = 0
+        for start, stop in self._iter_one_runs():
+            if start > pos:
+                yield 0, pos, start
+            yield 1, start, stop
+            pos = stop
+        if pos < self.size:
+            yield 0, pos, self.size
 
     def __str__(self):                                             
         'To create a print representation'
         if self.size == 0:                                           
             return ''                                                
-        return ''.join(map(str, self))                           
+        return format( self.int_val(), '0%db' % self.size )
 
     # Compare two bit vectors:
     def __eq__(self, other):                                         
+        if isinstance( other, (BitVectorView, _CompressedBitVector) ):
+            return other == self
         if self.size != other.size:                                  
             return False                                             
         i = 0                                                        
@@ -2468,10 +3292,15 @@ class BitVector( object ):
             bitvec_copy =  bitvec.deep_copy()
 
         Subsequently, any alterations to either of the bitvector objects
-        bitvec and bitvec_copy will not affect the other.
+        bitvec and bitvec_copy will not affect the other.  The words of
+        bitvec are copied as one block of memory.
         '''
-        copy = str( self )                                           
-        return BitVector( bitstring = copy )                         
+        copy = BitVector( size = 0, wordsize = self.wordsize )
+        copy.vector = array.array( _typecode(self.vector) )
+        copy.vector.frombytes( memoryview(self.vector).cast('B') )
+        copy.size = self.size
+        copy._cached_int = self._cached_int
+        return copy
 
     # For backward compatibility:
     _make_deep_copy = deep_copy
@@ -2481,16 +3310,17 @@ class BitVector( object ):
         Resize a bit vector by padding with n 0's from the left. Return the result as
         a new bit vector.
         '''
-        new_str = '0'*n + str( self )                                
-        return BitVector( bitstring = new_str )                      
+        res = BitVector( size = self.size, wordsize = self.wordsize )
+        memoryview( res.vector )[:] = self.vector
+        res._grow_to( self.size + n )
+        return res
 
     def _resize_pad_from_right( self, n ):                           
         '''
         Resize a bit vector by padding with n 0's from the right. Return the result
         as a new bit vector.
         '''
-        new_str = str( self ) + '0'*n                                
-        return BitVector( bitstring = new_str )                      
+        return self.deep_copy().pad_from_right( n )
 
     def pad_from_left( self, n ):                                   
         '''
@@ -2501,12 +3331,8 @@ class BitVector( object ):
         the extension is carried out by giving a new longer _vector
         attribute to the bitvector object).
         '''
-        new_str = '0'*n + str( self )                               
-        bitlist =  list(map( int, list(new_str) ))                  
-        self.size = len( bitlist )                                  
-        two_byte_ints_needed = (len(bitlist) + 15) // 16            
-        self.vector = array.array( 'H', [0]*two_byte_ints_needed )  
-        list(map( self._setbit, enumerate(bitlist), bitlist))       
+        self._grow_to( self.size + n )
+        return self
 
     def pad_from_right( self, n ):                                  
         '''
@@ -2517,12 +3343,11 @@ class BitVector( object ):
         the extension is carried out by giving a new longer _vector
         attribute to the bitvector object).
         '''
-        new_str = str( self ) + '0'*n                               
-        bitlist =  list(map( int, list(new_str) ))                  
-        self.size = len( bitlist )                                  
-        two_byte_ints_needed = (len(bitlist) + 15) // 16            
-        self.vector = array.array( 'H', [0]*two_byte_ints_needed )  
-        list(map( self._setbit, enumerate(bitlist), bitlist))       
+        if n > 0:
+            self._reserve( self.size + n )
+            self.size += n
+            self._invalidate()
+        return self
 
     def __contains__( self, otherBitVec ):                           
         '''
@@ -2534,7 +3359,7 @@ class BitVector( object ):
               raise ValueError("First arg bitvec too short")         
         max_index = self.size - otherBitVec.size + 1                 
         for i in range(max_index):                                   
-              if self[i:i+otherBitVec.size] == otherBitVec:          
+              if self.view(i, i+otherBitVec.size) == otherBitVec:
                     return True                                      
         return False                                                
 
@@ -2548,9 +3373,7 @@ class BitVector( object ):
         '''
         if val not in (0,1):                                         
             raise ValueError( "Incorrect reset argument" )           
-        bitlist = [val for i in range( self.size )]                  
-        list(map( self._setbit, enumerate(bitlist), bitlist ))       
-        return self                                                  
+        return self.fill( val )
 
     def count_bits( self ):                                          
         '''
@@ -2562,7 +3385,7 @@ class BitVector( object ):
         A call to count_bits() returns an integer value that is equal to
         the number of bits set in the bitvector.  
         '''
-        return sum(self)
+        return _popcount( self.vector )
 
     def set_value(self, *args, **kwargs):                            
         '''
@@ -2606,19 +3429,13 @@ class BitVector( object ):
         this method, estimates that if a bit vector with over 2 millions
         bits has only five bits set, this will return the answer in 1/18 of
         the time taken by the count_bits() method. Rhianon's implementation
-        is based on an algorithm generally known as the Brian Kernighan's
+        was based on an algorithm generally known as the Brian Kernighan's
         way, although its antecedents predate its mention by Kernighan and
-        Ritchie.
-        '''
-        num = 0                                                      
-        for intval in self.vector:                                   
-            if intval == 0: continue                                 
-            c = 0; iv = intval                                       
-            while iv > 0:                                            
-                iv = iv & (iv -1)                                    
-                c = c + 1                                            
-            num = num + c                                            
-        return num                                                  
+        Ritchie.  Both methods now count the bits of whole words at a time
+        (with int.bit_count(), or NumPy for long bit vectors), which is
+        faster still whether the bit vector is sparse or dense.
+        '''
+        return _popcount( self.vector )
 
     def jaccard_similarity(self, other):                          
         '''
@@ -2631,11 +3448,11 @@ class BitVector( object ):
 
         The value returned is a floating point number between 0 and 1.
         '''
-        assert self.intValue() > 0 or other.intValue() > 0, 'Jaccard called on two zero vectors --- NOT ALLOWED'   
         assert self.size == other.size, 'bitvectors for comparing with Jaccard must be of equal length'  
-        intersect = self & other                                     
-        union = self | other                                         
-        return ( intersect.count_bits_sparse() / float( union.count_bits_sparse() ) )             
+        intersect, union = self._count_combined( other, (operator.__and__, 'bitwise_and'),
+                                                        (operator.__or__, 'bitwise_or') )
+        assert union > 0, 'Jaccard called on two zero vectors --- NOT ALLOWED'
+        return ( intersect / float( union ) )
 
     def jaccard_distance( self, other ):                             
         '''
@@ -2663,8 +3480,32 @@ class BitVector( object ):
         positions in which the two operand bitvectors disagree.
         '''
         assert self.size == other.size, 'vectors of unequal length' 
-        diff = self ^ other                                         
-        return diff.count_bits_sparse()                             
+        diff, = self._count_combined( other, (operator.__xor__, 'bitwise_xor') )
+        return diff
+
+    def _count_combined(self, other, *ops):
+        '''
+        For each (op, ufunc) pair in ops, count the bits set in op applied to
+        the words of this bit vector and the equal sized bit vector other, in
+        one pass over the words and without making the combined bit vectors.
+        ufunc is the name of the NumPy function that does the same as op.
+        Returns a list of the counts.
+        '''
+        words1, words2 = self.vector, self._words_of( other )
+        if not (_numpy_popcount and len(words1) >= _NUMPY_MIN_WORDS):
+            x, y = int.from_bytes( words1, 'little' ), int.from_bytes( words2, 'little' )
+            return [ _bit_count( op(x, y) ) for op, ufunc in ops ]
+        view1, view2 = _numpy_view( words1 ), _numpy_view( words2 )
+        block = min( len(view1), _POPCOUNT_BLOCK_WORDS )
+        combined = numpy.empty( block, dtype = view1.dtype )
+        bits = numpy.empty( block, dtype = numpy.uint8 )
+        counts = [0] * len(ops)
+        for i in range( 0, len(view1), block ):
+            n = min( block, len(view1) - i )
+            for k, (op, ufunc) in enumerate( ops ):
+                getattr(numpy, ufunc)( view1[i:i+n], view2[i:i+n], out = combined[:n] )
+                counts[k] += int( numpy.bitwise_count( combined[:n], out = bits[:n] ).sum() )
+        return counts
 
     def next_set_bit(self, from_index=0):                           
         '''
@@ -2682,27 +3523,108 @@ class BitVector( object ):
         John Gleeson.
         '''
         assert from_index >= 0, 'from_index must be nonnegative'
-        i = from_index
+        w = self.wordsize
         v = self.vector
-        l = len(v)
-        o = i >> 4
-        s = i & 0x0F
-        i = o << 4
-        while o < l:
+        o, s = divmod(from_index, w)
+        if o >= len(v):
+            return -1
+        h = v[o] >> s
+        if h:
+            # the position of the lowest bit set in h
+            return o * w + s + (h & -h).bit_length() - 1
+        # compress() skips over the zero words without Python looking at them
+        for o in itertools.compress( range(o + 1, len(v)), memoryview(v)[o + 1:] ):
             h = v[o]
-            if h:
-                i += s
-                m = 1 << s
-                while m != (1 << 0x10):
-                    if h & m: return i
-                    m <<= 1
-                    i += 1
-            else:
-                i += 0x10
-            s = 0
-            o += 1
+            return o * w + (h & -h).bit_length() - 1
         return -1
 
+    def prev_set_bit(self, from_index = None):
+        '''
+        The mirror image of next_set_bit(): return the position of the last
+        bit set at or before from_index, which defaults to the last
+        position, or -1 if there is none:
+
+            bv = BitVector(bitstring = '0100000100000')
+            print(bv.prev_set_bit(6))                   # 1
+            print(bv.prev_set_bit())                    # 7
+        '''
+        if from_index is None or from_index >= self.size:
+            from_index = self.size - 1
+        if from_index < 0:
+            return -1
+        w = self.wordsize
+        v = self.vector
+        o, s = divmod( from_index, w )
+        h = v[o] & ((2 << s) - 1)
+        if h:
+            # the position of the highest bit set in h
+            return o * w + h.bit_length() - 1
+        for o in itertools.compress( range(o - 1, -1, -1), memoryview(v)[o - 1::-1] ):
+            return o * w + v[o].bit_length() - 1
+        return -1
+
+    def next_clear_bit(self, from_index = 0):
+        '''
+        Return the position of the first bit that is not set at or after
+        from_index, or -1 if there is none:
+
+            bv = BitVector(bitstring = '1110110')
+            print(bv.next_clear_bit(0))                 # 3
+            print(bv.next_clear_bit(4))                 # 6
+
+        Words with all their bits set are skipped over a word at a time.
+        '''
+        if from_index < 0:
+            raise ValueError( "from_index must be nonnegative" )
+        w = self.wordsize
+        v = self.vector
+        full = (1 << w) - 1
+        o, s = divmod( from_index, w )
+        if from_index >= self.size:
+            return -1
+        h = (v[o] ^ full) >> s
+        if h:
+            pos = o * w + s + (h & -h).bit_length() - 1
+        else:
+            for o in itertools.compress( range(o + 1, len(v)), map(full.__ne__, memoryview(v)[o + 1:]) ):
+                h = v[o] ^ full
+                pos = o * w + (h & -h).bit_length() - 1
+                break
+            else:
+                return -1
+        # the bits past the end of the bit vector are 0, but don't count
+        return pos if pos < self.size else -1
+
+    def find_clear_run(self, length, from_index = 0):
+        '''
+        Return the position of the first run of at least length bits that
+        are not set, starting at or after from_index, or -1 if there is no
+        such run.  For a bit vector that records which blocks are in use,
+        this finds room for length blocks in a row:
+
+            bv = BitVector(bitstring = '1001000011')
+            print(bv.find_clear_run(3))                 # 4
+
+        The search jumps from the start of each clear run to the next set
+        bit and back with next_clear_bit() and next_set_bit(), so it takes
+        time in proportion to the number of words and of runs it passes.
+        '''
+        if length < 1:
+            raise ValueError( "the length of the run must be positive" )
+        start = from_index
+        while True:
+            start = self.next_clear_bit( start )
+            if start == -1:
+                return -1
+            stop = self.next_set_bit( start )
+            if stop == -1:
+                stop = self.size
+            if stop - start >= length:
+                return start
+            if stop == self.size:
+                return -1
+            start = stop
+
     def rank_of_bit_set_at_index(self, position):                 
         '''
         You can measure the "rank" of a bit that is set at a given
@@ -2719,8 +3641,90 @@ class BitVector( object ):
         number.
         '''
         assert self[position] == 1, 'the arg bit not set'
-        bv = self[0:position+1]                                     
-        return bv.count_bits()                                      
+        if position < 0:
+            position += self.size
+        return self.rank1( position + 1 )
+
+    def _rank_directory(self):
+        '''
+        Return the rank directory (supers, blocks, total), building it if the
+        bits have changed since it was last built.  supers[s] is the number
+        of bits set before superblock s, the bits from s * 2**16 on; blocks[i]
+        is the number set between the start of the superblock of word i and
+        word i, which always fits in 16 bits; and total is the number set in
+        all.
+        '''
+        if self._rank_index is None:
+            n = len( self.vector )
+            per_super = (1 << _RANK_SUPERBLOCK_SHIFT) // self.wordsize
+            if _numpy_popcount and n >= _NUMPY_MIN_WORDS:
+                counts = numpy.bitwise_count( _numpy_view(self.vector) ).astype( numpy.uint64 )
+                before = numpy.concatenate( ([0], numpy.cumsum(counts)) ).astype( numpy.uint64 )
+                supers = array.array( 'Q', before[:n:per_super].tobytes() )
+                blocks = before[:n] - numpy.repeat( before[:n:per_super], per_super )[:n]
+                blocks = array.array( 'H', blocks.astype(numpy.uint16).tobytes() )
+                total = int( before[n] )
+            else:
+                before = array.array( 'Q', itertools.chain( (0,),
+                                           itertools.accumulate( map(_bit_count, self.vector) ) ) )
+                supers = before[:n:per_super]
+                blocks = array.array( 'H', map( operator.sub, before[:n],
+                             itertools.chain.from_iterable( itertools.repeat(s, per_super) for s in supers ) ) )
+                total = before[n]
+            self._rank_index = supers, blocks, total
+        return self._rank_index
+
+    def rank1(self, i):
+        '''
+        Return the number of bits set before position i, that is, at the
+        positions 0 through i-1, for i from 0 to len(self):
+
+            bv = BitVector(bitstring = '01010101011100')
+            print(bv.rank1(10))                 # 5
+
+        The first call builds a directory of bit counts, taking about a
+        quarter as much memory again as the bit vector itself, after which
+        each call takes constant time until the bits are changed.
+        '''
+        if not 0 <= i <= self.size:
+            raise ValueError( "index range error" )
+        supers, blocks, total = self._rank_directory()
+        block_index, shift = divmod( i, self.wordsize )
+        if block_index == len( blocks ):
+            return total
+        count = supers[i >> _RANK_SUPERBLOCK_SHIFT] + blocks[block_index]
+        if shift:
+            count += _bit_count( self.vector[block_index] & ((1 << shift) - 1) )
+        return count
+
+    def rank0(self, i):
+        'Return the number of bits not set before position i, as for rank1()'
+        return i - self.rank1( i )
+
+    def select1(self, k):
+        '''
+        Return the position of the bit set with k bits set before it, so
+        that bv.rank1(bv.select1(k)) == k, for k from 0 to one less than the
+        number of bits set:
+
+            bv = BitVector(bitstring = '01010101011100')
+            print(bv.select1(5))                # 10
+
+        This uses the same directory as rank1(), searching it by bisection.
+        '''
+        supers, blocks, total = self._rank_directory()
+        if not 0 <= k < total:
+            raise ValueError( "there are not %d bits set" % (k + 1) )
+        s = bisect.bisect_right( supers, k ) - 1
+        k -= supers[s]
+        per_super = (1 << _RANK_SUPERBLOCK_SHIFT) // self.wordsize
+        lo = s * per_super
+        block_index = bisect.bisect_right( blocks, k, lo, min(lo + per_super, len(blocks)) ) - 1
+        k -= blocks[block_index]
+        word = self.vector[block_index]
+        for _ in range( k ):
+            word &= word - 1
+        return block_index * self.wordsize + (word & -word).bit_length() - 1
 
     def is_power_of_2( self ):                                         
         '''
@@ -2983,29 +3987,18 @@ class BitVector( object ):
         The object returned by runs() is a list of strings, with each
         element of this list being a string of 1's and 0's.
         '''
-        allruns = []                                               
-        if self.size == 0:                                         
-            return allruns
-        run = ''                                                   
-        previous_bit = self[0]                                     
-        if previous_bit == 0:                                      
-            run = '0'                                              
-        else:                                                      
-            run = '1'                                              
-        for bit in list(self)[1:]:                                 
-            if bit == 0 and previous_bit == 0:                     
-                run += '0'                                         
-            elif bit == 1 and previous_bit == 0:                   
-                allruns.append( run )                              
-                run = '1'                                          
-            elif bit == 0 and previous_bit == 1:                   
-                allruns.append( run )                              
-                run = '0'                                          
-            else:                                                  
-                run += '1'                                         
-            previous_bit = bit                                     
-        allruns.append( run )                                      
-        return allruns                                             
+        return [ '01'[bit] * (stop - start) for bit, start, stop in self.iter_runs() ]
+
+    def compact(self):
+        '''
+        Return the bits of this bit vector in whichever of SparseBitVector,
+        RunBitVector and RoaringBitVector should take the least memory, or
+        this bit vector itself if none of them would take less than half as
+        much as it does.  The choice is made from the number of bits set, of
+        runs of 1's and of bits set in each 2**16 bits.
+        '''
+        res = _compact_runs( self.size, self._iter_one_runs() )
+        return self if isinstance( res, BitVector ) else res
 
     def test_for_primality(self):                                  
         '''
@@ -3084,29 +4077,645 @@ class BitVector( object ):
         version of a bit pattern.  This method is useful in the "Local Binary Pattern"
         algorithm for characterizing image textures.  If you are curious as to how, see my
         tutorial on "Measuring Texture and Color in Images."
+
+        The least rotation is found with Booth's algorithm, in time proportional to the
+        size of the bit vector, and the bit vector itself is left unchanged.  Bit vectors of
+        up to 64 bits, such as the 8-bit patterns of LBP, simply try every rotation of their
+        int value, which is quicker at that size.
         '''
-        intvals_for_circular_shifts  =  [int(self << 1) for _ in range(len(self))] 
-        return BitVector( intVal = min(intvals_for_circular_shifts), size = len(self))
+        n = self.size
+        if n == 0:
+            raise ValueError('''Circular shift of an empty vector makes no sense''')
+        if n <= 64:
+            x, mask = self.int_val(), (1 << n) - 1
+            return BitVector( intVal = min( ((x << k) | (x >> (n - k))) & mask for k in range(n) ),
+                              size = n, wordsize = self.wordsize )
+        bits = str( self )
+        k = _least_rotation( bits )
+        return BitVector( bitstring = bits[k:] + bits[:k], wordsize = self.wordsize )
 
 
 #--------------------------------  BitVectorIterator Class -----------------------------------
 
+# No longer used by BitVector.__iter__(), which returns its generator
+# directly, but kept for code that makes its own iterators this way.
 class BitVectorIterator:                                           
     def __init__( self, bitvec ):                                  
-        self.items = []                                            
-        for i in range( bitvec.size ):                             
-            self.items.append( bitvec._getbit(i) )                 
-        self.index = -1                                            
+        self.bits = itertools.islice( bitvec._iter_words(), bitvec.size )
     def __iter__( self ):                                          
         return self                                                
     def next( self ):                                              
-        self.index += 1                                            
-        if self.index < len( self.items ):                         
-            return self.items[ self.index ]                        
-        else:                                                      
-            raise StopIteration                                    
+        return next( self.bits )
     __next__ = next                                                
 
+#---------------------------------  BitVectorView Class -------------------------------------
+
+class BitVectorView( object ):
+    '''
+    A window onto the bits start to stop of a bit vector, returned by
+    BitVector.view().  It shares the memory of the bit vector: the words that
+    lie wholly inside the window are used in place, and the words at its two
+    ends are shifted into line as they are needed.
+    '''
+    def __init__( self, bitvec, start, stop ):
+        self.bitvec = bitvec
+        self.start = start
+        self.stop = stop
+        self.size = stop - start
+
+    def __len__( self ):
+        return self.size
+
+    def _position( self, pos ):
+        'The position in the underlying bit vector of bit pos of the view'
+        if pos >= self.size or pos < -self.size:
+            raise ValueError( "index range error" )
+        return self.start + pos % self.size
+
+    def __getitem__( self, pos ):
+        if isinstance( pos, slice ):
+            start, stop, step = pos.indices( self.size )
+            return self.bitvec._slice_copy( self.start + start, self.start + max(start, stop) )
+        return self.bitvec[ self._position(pos) ]
+
+    def __setitem__( self, pos, val ):
+        self.bitvec[ self._position(pos) ] = val
+
+    def __iter__( self ):
+        bits = _bits_of( self.bitvec.vector, self.bitvec.wordsize, self.start, self.stop )
+        return ( (bits >> i) & 1 for i in range(self.size) )
+
+    def copy( self ):
+        'Return the bits of the view as a new bit vector'
+        return self.bitvec._slice_copy( self.start, self.stop )
+
+    def __str__( self ):
+        return str( self.copy() )
+
+    def __int__( self ):
+        return self.copy().int_val()
+
+    int_val = __int__
+
+    def count_bits( self ):
+        'Return the number of bits set in the view'
+        bv, w = self.bitvec, self.bitvec.wordsize
+        # the whole words inside the view, and the part words at its ends
+        first, last = -(-self.start // w), self.stop // w
+        if first >= last:
+            return _bit_count( _bits_of(bv.vector, w, self.start, self.stop) )
+        return ( _popcount( memoryview(bv.vector)[first:last] )
+                 + _bit_count( _bits_of(bv.vector, w, self.start, first * w) )
+                 + _bit_count( _bits_of(bv.vector, w, last * w, self.stop) ) )
+
+    def __eq__( self, other ):
+        if self.size != len(other):
+            return False
+        if isinstance( other, BitVectorView ):
+            other_bits = _bits_of( other.bitvec.vector, other.bitvec.wordsize, other.start, other.stop )
+        else:
+            other_bits = _bits_of( other.vector, other.wordsize, 0, other.size )
+        return _bits_of( self.bitvec.vector, self.bitvec.wordsize, self.start, self.stop ) == other_bits
+
+    def __ne__( self, other ):
+        return not self == other
+
+    def __xor__( self, other ):
+        return self.copy() ^ other
+
+    def __and__( self, other ):
+        return self.copy() & other
+
+    def __or__( self, other ):
+        return self.copy() | other
+
+    def __invert__( self ):
+        return ~self.copy()
+
+    __rxor__ = __xor__
+    __rand__ = __and__
+    __ror__ = __or__
+
+#-------------------------------  Compressed Bit Vector Classes -----------------------------
+
+# A bit vector is only stored compressed by compact() if that should take
+# less than this fraction of the memory its words would
+_COMPACT_MAX_FRACTION = 0.5
+
+# RoaringBitVector stores each chunk of this many bits, as the positions of
+# its 1's if it has no more than _ARRAY_CONTAINER_MAX of them, and as a
+# BitVector otherwise (which then takes the same 8KB as 4096 16-bit positions)
+_CHUNK_SHIFT = 16
+_ARRAY_CONTAINER_MAX = 4096
+
+def _runs_of_positions(positions):
+    'Generate the (start, stop) runs of 1s of the sorted bit positions'
+    start = stop = None
+    for pos in positions:
+        if pos == stop:
+            stop += 1
+            continue
+        if start is not None:
+            yield start, stop
+        start, stop = pos, pos + 1
+    if start is not None:
+        yield start, stop
+
+def _merge_runs(runs):
+    'Generate the nonempty runs of the sorted runs, with touching runs joined'
+    start = stop = None
+    for a, b in runs:
+        if a == b:
+            continue
+        if a == stop:
+            stop = b
+            continue
+        if start is not None:
+            yield start, stop
+        start, stop = a, b
+    if start is not None:
+        yield start, stop
+
+def _shifted_runs(runs, offset):
+    return ( (a + offset, b + offset) for a, b in runs )
+
+def _complement_runs(runs, size):
+    'Generate the runs of 0s of a bit vector of size bits, given its runs of 1s'
+    pos = 0
+    for a, b in runs:
+        if a > pos:
+            yield pos, a
+        pos = b
+    if pos < size:
+        yield pos, size
+
+def _combine_runs(runs1, runs2, keep):
+    '''
+    Generate the runs of 1s of the bitwise combination of two bit vectors,
+    given their runs of 1s, where a bit is 1 when keep(bit1, bit2) is true.
+    Each run boundary flips the bit of one of the bit vectors, so the runs
+    are found by sweeping over the boundaries of both in order, without
+    decompressing either.
+    '''
+    def boundaries(runs, which):
+        for a, b in runs:
+            yield a, which
+            yield b, which
+    bits = [0, 0]
+    start = None
+    merged = heapq.merge( boundaries(runs1, 0), boundaries(runs2, 1) )
+    for pos, group in itertools.groupby( merged, operator.itemgetter(0) ):
+        for _, which in group:
+            bits[which] ^= 1
+        if keep( *bits ):
+            if start is None:
+                start = pos
+        elif start is not None:
+            yield start, pos
+            start = None
+
+def _ones_runs(bits):
+    'Generate the runs of 1s of a BitVector, BitVectorView or compressed bit vector'
+    if isinstance( bits, BitVectorView ):
+        bits = bits.copy()
+    return bits._iter_one_runs()
+
+def _bitvector_of_runs(size, runs, wordsize = None):
+    '''
+    Return a BitVector of size bits with the runs of 1s given.  Many short
+    runs are quicker to put together as a string of 1s and 0s than to set
+    one at a time.
+    '''
+    wordsize = wordsize or BitVector.wordsize
+    runs = list( runs )
+    if len( runs ) * wordsize > size:
+        pieces = []
+        pos = 0
+        for a, b in runs:
+            pieces.append( '0' * (a - pos) )
+            pieces.append( '1' * (b - a) )
+            pos = b
+        pieces.append( '0' * (size - pos) )
+        return BitVector( bitstring = ''.join(pieces), wordsize = wordsize )
+    bv = BitVector( size = size, wordsize = wordsize )
+    for a, b in runs:
+        bv.set_range( a, b, 1 )
+    return bv
+
+def _compact_runs(size, runs):
+    '''
+    Return a bit vector of size bits with the given runs of 1s, in whichever
+    representation is estimated to take the least memory: 8 bytes for each
+    position of a SparseBitVector, 16 for each run of a RunBitVector, and
+    for a RoaringBitVector 2 for each position in a chunk, up to 8KB for a
+    chunk.  A plain BitVector is used unless one of these comes to less than
+    _COMPACT_MAX_FRACTION of size / 8 bytes, as the others are slower to work
+    with.
+    '''
+    runs = list( runs )
+    count = 0
+    chunk_counts = {}
+    for a, b in runs:
+        count += b - a
+        while a < b:
+            chunk = a >> _CHUNK_SHIFT
+            end = min( b, (chunk + 1) << _CHUNK_SHIFT )
+            chunk_counts[chunk] = chunk_counts.get( chunk, 0 ) + end - a
+            a = end
+    costs = [ (8 * count, SparseBitVector),
+              (16 * len(runs), RunBitVector),
+              (sum( 16 + min(2 * c, 2 * _ARRAY_CONTAINER_MAX) for c in chunk_counts.values() ),
+               RoaringBitVector) ]
+    cost, cls = min( costs, key = operator.itemgetter(0) )
+    if cost >= _COMPACT_MAX_FRACTION * size / 8:
+        return _bitvector_of_runs( size, runs )
+    return cls._from_runs( size, runs )
+
+
+class _CompressedBitVector( object ):
+    '''
+    The methods shared by the compressed bit vector classes below, in terms
+    of the runs of 1s that each of them generates with _iter_one_runs(), as
+    BitVector does, and is made from with _from_runs().  The logical
+    operators work on the runs of both operands, whatever they are stored
+    as, and give a result stored as compact() would choose.  As for
+    BitVector, the shorter operand is padded with 0s from the left.
+    '''
+    def __len__( self ):
+        return self.size
+
+    def _index( self, pos ):
+        if pos >= self.size or pos < -self.size:
+            raise ValueError( "index range error" )
+        return pos + self.size if pos < 0 else pos
+
+    def iter_set_bits( self ):
+        for start, stop in self._iter_one_runs():
+            yield from range( start, stop )
+
+    def iter_runs( self ):
+        pos = 0
+        for start, stop in self._iter_one_runs():
+            if start > pos:
+                yield 0, pos, start
+            yield 1, start, stop
+            pos = stop
+        if pos < self.size:
+            yield 0, pos, self.size
+
+    def runs( self ):
+        return [ '01'[bit] * (stop - start) for bit, start, stop in self.iter_runs() ]
+
+    def __iter__( self ):
+        for bit, start, stop in self.iter_runs():
+            yield from itertools.repeat( bit, stop - start )
+
+    def count_bits( self ):
+        return sum( stop - start for start, stop in self._iter_one_runs() )
+
+    def count_bits_sparse( self ):
+        return self.count_bits()
+
+    def is_power_of_2( self ):
+        return self.count_bits() == 1
+
+    is_power_of_2_sparse = is_power_of_2
+
+    def next_set_bit( self, from_index = 0 ):
+        for start, stop in self._iter_one_runs():
+            if stop > from_index:
+                return max( start, from_index )
+        return -1
+
+    def to_bitvector( self, wordsize = None ):
+        'Return the bits as an ordinary BitVector'
+        return _bitvector_of_runs( self.size, self._iter_one_runs(), wordsize )
+
+    def deep_copy( self ):
+        return self._from_runs( self.size, self._iter_one_runs() )
+
+    def compact( self ):
+        'Return the bits stored in the representation that compact() on a BitVector would choose'
+        return _compact_runs( self.size, self._iter_one_runs() )
+
+    def int_val( self ):
+        return self.to_bitvector().int_val()
+
+    __int__ = int_val
+
+    def __str__( self ):
+        return str( self.to_bitvector() )
+
+    def __eq__( self, other ):
+        if isinstance( other, BitVectorView ):
+            other = other.copy()
+        if not isinstance( other, (BitVector, _CompressedBitVector) ):
+            return NotImplemented
+        return self.size == other.size and \
+            all( itertools.starmap( operator.__eq__, itertools.zip_longest(self._iter_one_runs(),
+                                                                           other._iter_one_runs()) ) )
+
+    def __ne__( self, other ):
+        return not self == other
+
+    def _combine( self, other, op ):
+        if isinstance( other, BitVectorView ):
+            other = other.copy()
+        if not isinstance( other, (BitVector, _CompressedBitVector) ):
+            return NotImplemented
+        size = max( self.size, other.size )
+        return _compact_runs( size, _combine_runs( _shifted_runs(self._iter_one_runs(), size - self.size),
+                                                   _shifted_runs(_ones_runs(other), size - other.size),
+                                                   op ) )
+
+    def __and__( self, other ):
+        return self._combine( other, operator.__and__ )
+
+    def __or__( self, other ):
+        return self._combine( other, operator.__or__ )
+
+    def __xor__( self, other ):
+        return self._combine( other, operator.__xor__ )
+
+    # the operators are symmetric, so BitVector & compressed can use these
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+    def __invert__( self ):
+        return _compact_runs( self.size, _complement_runs(self._iter_one_runs(), self.size) )
+
+
+class SparseBitVector( _CompressedBitVector ):
+    '''
+    A bit vector stored as the sorted positions of its 1s, for bit vectors
+    with few bits set:
+
+        sbv = SparseBitVector( size = 10**9, positions = [5, 70000, 123456789] )
+    '''
+    def __init__( self, size = 0, positions = () ):
+        self.size = size
+        self.positions = array.array( 'Q', sorted(set(positions)) )
+        if self.positions and self.positions[-1] >= size:
+            raise ValueError( "index range error" )
+
+    @classmethod
+    def _from_runs( cls, size, runs ):
+        sbv = cls( size )
+        sbv.positions = array.array( 'Q', itertools.chain.from_iterable(itertools.starmap(range, runs)) )
+        return sbv
+
+    def _iter_one_runs( self ):
+        return _runs_of_positions( self.positions )
+
+    def iter_set_bits( self ):
+        return iter( self.positions )
+
+    def count_bits( self ):
+        return len( self.positions )
+
+    def __getitem__( self, pos ):
+        pos = self._index( pos )
+        i = bisect.bisect_left( self.positions, pos )
+        return int( i < len(self.positions) and self.positions[i] == pos )
+
+    def __setitem__( self, pos, val ):
+        if val not in (0, 1):
+            raise ValueError( "incorrect value for a bit" )
+        pos = self._index( pos )
+        i = bisect.bisect_left( self.positions, pos )
+        present = i < len(self.positions) and self.positions[i] == pos
+        if val and not present:
+            self.positions.insert( i, pos )
+        elif present and not val:
+            del self.positions[i]
+
+    def next_set_bit( self, from_index = 0 ):
+        i = bisect.bisect_left( self.positions, from_index )
+        return self.positions[i] if i < len(self.positions) else -1
+
+    def _combine( self, other, op ):
+        if not isinstance( other, SparseBitVector ) or other.size != self.size:
+            return _CompressedBitVector._combine( self, other, op )
+        # the set operations on the positions are quicker than sweeping
+        positions = sorted( op(set(self.positions), set(other.positions)) )
+        return _compact_runs( self.size, _runs_of_positions(positions) )
+
+
+class RunBitVector( _CompressedBitVector ):
+    '''
+    A bit vector stored as the runs of its 1s, each as the positions where
+    it starts and stops, for bit vectors whose bits come in long runs:
+
+        rbv = RunBitVector( size = 10**9, runs = [(0, 5000), (10**6, 3 * 10**6)] )
+    '''
+    def __init__( self, size = 0, runs = () ):
+        self.size = size
+        self._set_runs( _merge_runs(sorted(runs)) )
+        if self.starts and (self.starts[0] < 0 or self.stops[-1] > size):
+            raise ValueError( "index range error" )
+
+    @classmethod
+    def _from_runs( cls, size, runs ):
+        rbv = cls( size )
+        rbv._set_runs( _merge_runs(runs) )
+        return rbv
+
+    def _set_runs( self, runs ):
+        self.starts = array.array( 'Q' )
+        self.stops = array.array( 'Q' )
+        for a, b in runs:
+            self.starts.append( a )
+            self.stops.append( b )
+
+    def _iter_one_runs( self ):
+        return zip( self.starts, self.stops )
+
+    def count_bits( self ):
+        return sum( self.stops ) - sum( self.starts )
+
+    def __getitem__( self, pos ):
+        pos = self._index( pos )
+        i = bisect.bisect_right( self.starts, pos ) - 1
+        return int( i >= 0 and pos < self.stops[i] )
+
+    def __setitem__( self, pos, val ):
+        if val not in (0, 1):
+            raise ValueError( "incorrect value for a bit" )
+        pos = self._index( pos )
+        if self[pos] != val:
+            keep = operator.__or__ if val else (lambda bit, clear: bit and not clear)
+            self._set_runs( list(_combine_runs(self._iter_one_runs(), [(pos, pos + 1)], keep)) )
+
+    def next_set_bit( self, from_index = 0 ):
+        # the first run that stops after from_index
+        i = bisect.bisect_right( self.stops, from_index )
+        return max( self.starts[i], from_index ) if i < len(self.stops) else -1
+
+
+class RoaringBitVector( _CompressedBitVector ):
+    '''
+    A bit vector stored in the manner of a Roaring bitmap.  It is split into
+    chunks of 2**16 bits, and each chunk with any bits set is stored in a
+    container of its own: the sorted array of the positions of its 1s in the
+    chunk if it has no more than 4096 of them, and otherwise a BitVector of
+    2**16 bits.  keys holds the sorted numbers of the chunks stored and
+    containers their containers.
+
+        rbv = RoaringBitVector( size = 10**9, positions = range(0, 10**9, 1000) )
+
+    The logical operators combine two RoaringBitVectors of the same size
+    chunk by chunk, using the operators of the containers.
+    '''
+    def __init__( self, size = 0, positions = () ):
+        self.size = size
+        positions = sorted( set(positions) )
+        if positions and (positions[0] < 0 or positions[-1] >= size):
+            raise ValueError( "index range error" )
+        self._set_runs( _runs_of_positions(positions) )
+
+    @classmethod
+    def _from_runs( cls, size, runs ):
+        rbv = cls( size )
+        rbv._set_runs( runs )
+        return rbv
+
+    def _set_runs( self, runs ):
+        self.keys = []
+        self.containers = []
+        def pieces():
+            # split the runs at the chunk boundaries
+            for a, b in runs:
+                while a < b:
+                    key = a >> _CHUNK_SHIFT
+                    end = min( b, (key + 1) << _CHUNK_SHIFT )
+                    yield key, a, end
+                    a = end
+        for key, group in itertools.groupby( pieces(), operator.itemgetter(0) ):
+            base = key << _CHUNK_SHIFT
+            chunk_runs = [ (a - base, b - base) for _, a, b in group ]
+            if sum( b - a for a, b in chunk_runs ) <= _ARRAY_CONTAINER_MAX:
+                container = array.array( 'H', itertools.chain.from_iterable(itertools.starmap(range, chunk_runs)) )
+            else:
+                container = _bitvector_of_runs( 1 << _CHUNK_SHIFT, chunk_runs )
+            self.keys.append( key )
+            self.containers.append( container )
+
+    @staticmethod
+    def _normalized( container ):
+        'Return the container in the form its number of 1s calls for, or None if it is empty'
+        if isinstance( container, BitVector ):
+            if container.count_bits() <= _ARRAY_CONTAINER_MAX:
+                container = array.array( 'H', container.iter_set_bits() )
+        elif len( container ) > _ARRAY_CONTAINER_MAX:
+            container = _bitvector_of_runs( 1 << _CHUNK_SHIFT, _runs_of_positions(container) )
+        return container if len( container ) else None
+
+    def _iter_one_runs( self ):
+        def chunk_runs():
+            for key, container in zip( self.keys, self.containers ):
+                base = key << _CHUNK_SHIFT
+                if isinstance( container, BitVector ):
+                    runs = container._iter_one_runs()
+                else:
+                    runs = _runs_of_positions( container )
+                for a, b in runs:
+                    yield base + a, base + b
+        # a run may carry on from the end of one chunk into the next
+        return _merge_runs( chunk_runs() )
+
+    def count_bits( self ):
+        return sum( c.count_bits() if isinstance(c, BitVector) else len(c) for c in self.containers )
+
+    def next_set_bit( self, from_index = 0 ):
+        i = bisect.bisect_left( self.keys, from_index >> _CHUNK_SHIFT )
+        for key, container in zip( self.keys[i:], self.containers[i:] ):
+            base = key << _CHUNK_SHIFT
+            low = max( from_index - base, 0 )
+            if isinstance( container, BitVector ):
+                pos = container.next_set_bit( low )
+                if pos != -1:
+                    return base + pos
+            else:
+                j = bisect.bisect_left( container, low )
+                if j < len( container ):
+                    return base + container[j]
+        return -1
+
+    def _container( self, key ):
+        i = bisect.bisect_left( self.keys, key )
+        return i, (self.containers[i] if i < len(self.keys) and self.keys[i] == key else None)
+
+    def __getitem__( self, pos ):
+        key, low = divmod( self._index(pos), 1 << _CHUNK_SHIFT )
+        i, container = self._container( key )
+        if container is None:
+            return 0
+        if isinstance( container, BitVector ):
+            return container[low]
+        j = bisect.bisect_left( container, low )
+        return int( j < len(container) and container[j] == low )
+
+    def __setitem__( self, pos, val ):
+        if val not in (0, 1):
+            raise ValueError( "incorrect value for a bit" )
+        key, low = divmod( self._index(pos), 1 << _CHUNK_SHIFT )
+        i, container = self._container( key )
+        if container is None:
+            if val:
+                self.keys.insert( i, key )
+                self.containers.insert( i, array.array('H', [low]) )
+            return
+        if isinstance( container, BitVector ):
+            container[low] = val
+            if val:
+                return
+        else:
+            j = bisect.bisect_left( container, low )
+            present = j < len(container) and container[j] == low
+            if val and not present:
+                container.insert( j, low )
+            elif present and not val:
+                del container[j]
+            else:
+                return
+        container = self._normalized( container )
+        if container is None:
+            del self.keys[i], self.containers[i]
+        else:
+            self.containers[i] = container
+
+    def _combine( self, other, op ):
+        if not isinstance( other, RoaringBitVector ) or other.size != self.size:
+            return _CompressedBitVector._combine( self, other, op )
+        # combine the two chunk by chunk; a chunk missing from one is all 0s
+        mine = dict( zip(self.keys, self.containers) )
+        theirs = dict( zip(other.keys, other.containers) )
+        res = RoaringBitVector( self.size )
+        for key in sorted( set(mine) | set(theirs) ):
+            a, b = mine.get( key ), theirs.get( key )
+            if a is None or b is None:
+                if op is operator.__and__:
+                    continue
+                present = a if b is None else b
+                if isinstance( present, BitVector ):
+                    container = present.deep_copy()
+                else:
+                    container = array.array( 'H', present )
+            elif isinstance( a, array.array ) and isinstance( b, array.array ):
+                container = array.array( 'H', sorted(op(set(a), set(b))) )
+            else:
+                if isinstance( a, array.array ):
+                    a = _bitvector_of_runs( 1 << _CHUNK_SHIFT, _runs_of_positions(a) )
+                if isinstance( b, array.array ):
+                    b = _bitvector_of_runs( 1 << _CHUNK_SHIFT, _runs_of_positions(b) )
+                container = op( a, b )
+            container = self._normalized( container )
+            if container is not None:
+                res.keys.append( key )
+                res.containers.append( container )
+        return res
+
 #-----------------------------------  End of Class Definition -------------------------------
 
 #----------------------------------     Test Code Follows    --------------------------------
@@ -3638,6 +5247,21 @@ if __name__ == '__main__':
     bv.shift_left(1).shift_left(1)
     print(bv)
 
+    print("\nExperiments with append(), append_bits() and extend():")
+    bv = BitVector(bitstring = '11')
+    bv.append(0).append_bits(5, 4)
+    print(bv)                                    # 1100101
+    bv.extend([1, 1])
+    print(bv)                                    # 110010111
+    bv.extend(bv)
+    print(bv)                                    # 110010111110010111
+    bv = BitVector(bitstring = '10' * 32)        # ends on a word boundary
+    bv.extend(BitVector(bitstring = '111'))
+    print(bv.count_bits(), len(bv))              # 35 67
+    bv = BitVector(bitstring = '10' * 32)
+    bv.extend(bv)
+    print(bv.count_bits(), len(bv))              # 64 128
+
     # UNCOMMENT THE FOLLOWING LINES TO TEST THE
     # PRIMALITY TESTING METHOD. IT SHOULD SHOW
     # THAT ALL OF THE FOLLOWING NUMBERS ARE PRIME:
@@ -1,5 +1,5 @@
 from tkinter import *
-from BitHash import BitHash
+from BitHash import BitHash, multi
 from BitVector import BitVector
 from recordclass import recordclass
 
@@ -27,8 +27,11 @@ class BloomFilter(object):
     # Create a Bloom Filter that will store numKeys keys, using
     # numHashes hash functions, and that will have a false positive
     # rate of maxFalsePositive.
+    # If doubleHashing is True, all the hash values for a key are
+    # derived from just two hashes of it (see BitHash.multi) instead
+    # of hashing the key once for each hash function.
     # All attributes must be private.
-    def __init__(self, numKeys, numHashes, maxFalsePositive):
+    def __init__(self, numKeys, numHashes, maxFalsePositive, doubleHashing=False):
 
         # of bits needed is the size to make the bit vector
         self.__size = self.__bitsNeeded(numKeys, numHashes, maxFalsePositive)
@@ -38,25 +41,38 @@ class BloomFilter(object):
         self.__numKeys = numKeys
         self.__numHashes = numHashes
         self.__maxFalsePositive = maxFalsePositive
+        self.__doubleHashing = doubleHashing
 
         # attribute counter for each bit set to 1
         self.__numBitsSet = 0
         #parallel list that displays the contents of the bit vector
         self.__displayList = [0] * self.__size
 
-    # ANIMATION METHODS
+    # Yields the bit vector index given by each of the hash functions
+    def __hashIndexes(self, key):
+        if self.__doubleHashing:
+            for hv in multi(key, self.__numHashes, self.__size):
+                yield hv
+            return
 
-    def insert(self, key):
-        global cleanup
-        findDisplayObjects = []
         # before the 1st hash value there is no seed
         seed = 0
 
         # create number of hash values passed into the bloom filter
         for i in range(self.__numHashes):
             h = BitHash(key, seed)
-            hv = h % self.__size
+            yield h % self.__size
+
+            # make old hash value new seed
+            seed = h
+
+    # ANIMATION METHODS
+
+    def insert(self, key):
+        global cleanup
+        findDisplayObjects = []
 
+        for hv in self.__hashIndexes(key):
             # if location wasn't set, change the bit and increment bit counter
             if self.__bv[hv] == 0:
                 self.__bv[hv] = 1
@@ -76,10 +92,6 @@ class BloomFilter(object):
                 cleanup += findDisplayObjects
                 self.__numBitsSet += 1
 
-
-
-            # make old hash value new seed
-            seed = h
         window.update()
 
     # Returns True if key MAY have been inserted into the Bloom filter.
@@ -92,14 +104,9 @@ class BloomFilter(object):
         x = (CELL_SIZE / 2)
         y0 = BF_Y0 - 40
         y1 = BF_Y0 - 15
-        # before the 1st hash value there is no seed
-        seed = 0
 
-        # create number of hash values passed into the bloom filter
-        for i in range(self.__numHashes):
+        for hv in self.__hashIndexes(key):
             window.update()
-            h = BitHash(key, seed)
-            hv = h % self.__size
             xpos = CELL_SIZE * hv + 20
             # check for the key not inserted, return false
             if self.__bv[hv] == 0:
@@ -113,8 +120,6 @@ class BloomFilter(object):
                 findDisplayObjects.append(self.__displayList[hv].display_val)
                 window.update()
                 cleanup += findDisplayObjects
-            # make old hash value new seed
-            seed = h
         cleanup += findDisplayObjects
         # all bits were set
         return True